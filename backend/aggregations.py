@@ -0,0 +1,404 @@
+from models import db, Project, ProjectMember, Task, TaskAssignment, TaskComment, Timesheet, Expense, ProjectFinancial, ProjectExpenseStatusTotal
+from sqlalchemy import func, case, and_
+from datetime import datetime
+
+# Task states that count as finished (not overdue)
+CLOSED_TASK_STATES = ['done', 'completed', 'closed']
+
+# Expense status for grouping and filtering: NULL counts as pending, on the rollup and base-table paths alike
+EXPENSE_STATUS = func.coalesce(Expense.status, 'pending')
+
+
+# ==================== PER-TABLE ROLLUPS ====================
+# Each rollup issues a single grouped query over the requested projects and
+# returns a dict keyed by project id. Projects without rows get zeroed figures.
+
+def task_rollup(project_ids):
+    """Task counts by state/priority plus overdue count, one query for all projects"""
+    today = datetime.now().date()
+    overdue = case(
+        (and_(Task.due_date < today, Task.state.notin_(CLOSED_TASK_STATES)), 1),
+        else_=0
+    )
+
+    rows = db.session.query(
+        Task.project_id,
+        Task.state,
+        Task.priority,
+        func.count(Task.id),
+        func.sum(overdue)
+    ).filter(
+        Task.project_id.in_(project_ids)
+    ).group_by(Task.project_id, Task.state, Task.priority).all()
+
+    result = {pid: {
+        'total_tasks': 0,
+        'overdue_tasks': 0,
+        'by_state': {},
+        'by_priority': {}
+    } for pid in project_ids}
+
+    for project_id, state, priority, count, overdue_count in rows:
+        stats = result[project_id]
+        stats['total_tasks'] += count
+        stats['overdue_tasks'] += int(overdue_count or 0)
+        stats['by_state'][state] = stats['by_state'].get(state, 0) + count
+        stats['by_priority'][priority] = stats['by_priority'].get(priority, 0) + count
+
+    return result
+
+
+def timesheet_rollup(project_ids):
+    """Total/billable hours and cost per project in a single grouped query"""
+    rows = db.session.query(
+        Timesheet.project_id,
+        func.sum(Timesheet.hours),
+        func.sum(case((Timesheet.billable == True, Timesheet.hours), else_=0)),
+        func.sum(Timesheet.cost_amount)
+    ).filter(
+        Timesheet.project_id.in_(project_ids)
+    ).group_by(Timesheet.project_id).all()
+
+    result = {pid: {'total_hours': 0.0, 'billable_hours': 0.0, 'total_cost': 0.0} for pid in project_ids}
+    for project_id, total_hours, billable_hours, total_cost in rows:
+        result[project_id] = {
+            'total_hours': float(total_hours or 0),
+            'billable_hours': float(billable_hours or 0),
+            'total_cost': float(total_cost or 0)
+        }
+    return result
+
+
+def expense_rollup(project_ids):
+    """Total/approved/billable expense amounts per project in a single grouped query"""
+    rows = db.session.query(
+        Expense.project_id,
+        func.sum(Expense.amount),
+        func.sum(case((Expense.status == 'approved', Expense.amount), else_=0)),
+        func.sum(case((Expense.billable == True, Expense.amount), else_=0))
+    ).filter(
+        Expense.project_id.in_(project_ids)
+    ).group_by(Expense.project_id).all()
+
+    result = {pid: {'total_expenses': 0.0, 'approved_expenses': 0.0, 'billable_expenses': 0.0} for pid in project_ids}
+    for project_id, total_expenses, approved_expenses, billable_expenses in rows:
+        result[project_id] = {
+            'total_expenses': float(total_expenses or 0),
+            'approved_expenses': float(approved_expenses or 0),
+            'billable_expenses': float(billable_expenses or 0)
+        }
+    return result
+
+
+def financial_rollup(project_ids):
+    """Timesheet and expense figures read from the project_financials rollup
+
+    Projects that have no rollup row yet (created before the rollup existed and
+    not rebuilt since) fall back to scanning the base tables.
+    """
+    rows = db.session.query(
+        ProjectFinancial,
+        ProjectExpenseStatusTotal.amount
+    ).outerjoin(
+        ProjectExpenseStatusTotal,
+        and_(
+            ProjectExpenseStatusTotal.project_id == ProjectFinancial.project_id,
+            ProjectExpenseStatusTotal.status == 'approved'
+        )
+    ).filter(
+        ProjectFinancial.project_id.in_(project_ids)
+    ).all()
+
+    timesheets = {}
+    expenses = {}
+    for financial, approved_amount in rows:
+        timesheets[financial.project_id] = {
+            'total_hours': float(financial.total_hours),
+            'billable_hours': float(financial.billable_hours),
+            'total_cost': float(financial.total_cost)
+        }
+        expenses[financial.project_id] = {
+            'total_expenses': float(financial.total_expenses),
+            'approved_expenses': float(approved_amount or 0),
+            'billable_expenses': float(financial.billable_expenses)
+        }
+
+    missing = [pid for pid in project_ids if pid not in timesheets]
+    if missing:
+        timesheets.update(timesheet_rollup(missing))
+        expenses.update(expense_rollup(missing))
+
+    return timesheets, expenses
+
+
+def project_expense_totals(project_id):
+    """Total and per-status expense figures for a project from the rollup, or None if not rolled up"""
+    financial = ProjectFinancial.query.get(project_id)
+    if financial is None:
+        return None
+
+    by_status = db.session.query(
+        ProjectExpenseStatusTotal.status,
+        ProjectExpenseStatusTotal.amount,
+        ProjectExpenseStatusTotal.expense_count
+    ).filter(
+        ProjectExpenseStatusTotal.project_id == project_id,
+        ProjectExpenseStatusTotal.expense_count > 0
+    ).all()
+
+    return float(financial.total_expenses), by_status
+
+
+def portfolio_financials(project_count):
+    """Hours, cost and expense totals across all projects from the rollup, or None if incomplete"""
+    rolled_up, total_hours, total_cost, total_expenses = db.session.query(
+        func.count(ProjectFinancial.project_id),
+        func.sum(ProjectFinancial.total_hours),
+        func.sum(ProjectFinancial.total_cost),
+        func.sum(ProjectFinancial.total_expenses)
+    ).one()
+    if rolled_up < project_count:
+        return None
+
+    pending_expenses = db.session.query(func.sum(ProjectExpenseStatusTotal.amount)).filter(
+        ProjectExpenseStatusTotal.status == 'pending'
+    ).scalar()
+
+    return {
+        'total_hours': float(total_hours or 0),
+        'total_cost': float(total_cost or 0),
+        'total_expenses': float(total_expenses or 0),
+        'pending_expenses': float(pending_expenses or 0)
+    }
+
+
+def member_counts(project_ids):
+    """Number of project members per project without loading the collections"""
+    rows = db.session.query(
+        ProjectMember.project_id,
+        func.count(ProjectMember.id)
+    ).filter(
+        ProjectMember.project_id.in_(project_ids)
+    ).group_by(ProjectMember.project_id).all()
+
+    result = {pid: 0 for pid in project_ids}
+    result.update({project_id: count for project_id, count in rows})
+    return result
+
+
+# ==================== PER-TASK COUNTS ====================
+# Grouped subqueries meant to be outer-joined onto a Task query so child counts
+# come back in the same statement instead of loading each collection.
+
+def assignment_counts_subquery(project_id):
+    """Assignments per task for one project, as (task_id, count)"""
+    return db.session.query(
+        TaskAssignment.task_id.label('task_id'),
+        func.count(TaskAssignment.id).label('count')
+    ).join(
+        Task, TaskAssignment.task_id == Task.id
+    ).filter(
+        Task.project_id == project_id
+    ).group_by(TaskAssignment.task_id).subquery()
+
+
+def comment_counts_subquery(project_id):
+    """Comments per task for one project, as (task_id, count)"""
+    return db.session.query(
+        TaskComment.task_id.label('task_id'),
+        func.count(TaskComment.id).label('count')
+    ).join(
+        Task, TaskComment.task_id == Task.id
+    ).filter(
+        Task.project_id == project_id
+    ).group_by(TaskComment.task_id).subquery()
+
+
+# ==================== PROJECT SUMMARY ====================
+
+def build_project_summary(project, tasks, timesheets, expenses, member_count):
+    """Assemble the project summary payload from precomputed rollups"""
+    duration_days = None
+    if project.start_date and project.end_date:
+        duration_days = (project.end_date - project.start_date).days
+
+    budget_amount = float(project.budget_amount or 0)
+    total_hours = timesheets['total_hours']
+    billable_hours = timesheets['billable_hours']
+    total_cost = timesheets['total_cost']
+    total_expenses = expenses['total_expenses']
+    approved_expenses = expenses['approved_expenses']
+    combined_cost = total_cost + total_expenses
+
+    return {
+        'project': {
+            'id': project.id,
+            'project_code': project.project_code,
+            'name': project.name,
+            'status': project.status,
+            'budget_amount': project.budget_amount,
+            'start_date': project.start_date.isoformat() if project.start_date else None,
+            'end_date': project.end_date.isoformat() if project.end_date else None,
+            'duration_days': duration_days
+        },
+        'team': {
+            'team_size': member_count + (1 if project.project_manager_id else 0),
+            'project_manager_id': project.project_manager_id
+        },
+        'tasks': tasks,
+        'timesheets': {
+            'total_hours': total_hours,
+            'billable_hours': billable_hours,
+            'non_billable_hours': total_hours - billable_hours,
+            'total_cost': total_cost
+        },
+        'expenses': {
+            'total_expenses': total_expenses,
+            'approved_expenses': approved_expenses,
+            'pending_expenses': total_expenses - approved_expenses,
+            'billable_expenses': expenses['billable_expenses']
+        },
+        'budget_analysis': {
+            'budget_amount': budget_amount,
+            'total_cost': combined_cost,
+            'remaining_budget': budget_amount - combined_cost,
+            'budget_utilization_percent': round(combined_cost / budget_amount * 100, 2) if budget_amount > 0 else 0
+        }
+    }
+
+
+def project_summaries(projects):
+    """Build summaries for several projects with one grouped query per source table"""
+    project_ids = [p.id for p in projects]
+    if not project_ids:
+        return {}
+
+    tasks = task_rollup(project_ids)
+    timesheets, expenses = financial_rollup(project_ids)
+    members = member_counts(project_ids)
+
+    return {
+        p.id: build_project_summary(p, tasks[p.id], timesheets[p.id], expenses[p.id], members[p.id])
+        for p in projects
+    }
+
+
+# ==================== PORTFOLIO REPORT ====================
+# One row per project with hours, costs, expenses and task counts. The SQL
+# engine below and the columnar engine (columnar.py) compute the same figures
+# and share the row builder, so either can serve the report.
+
+def portfolio_row(project, timesheets, expenses, tasks):
+    """Report row from (id, code, name, status, budget), (hours, billable hours, cost),
+    (expenses, approved, billable) and (tasks, open, overdue, {state: count})"""
+    project_id, project_code, name, status, budget_amount = project
+    total_hours, billable_hours, timesheet_cost = timesheets
+    total_expenses, approved_expenses, billable_expenses = expenses
+    total_tasks, open_tasks, overdue_tasks, by_state = tasks
+    budget_amount = float(budget_amount or 0)
+    total_cost = timesheet_cost + total_expenses
+
+    return {
+        'id': project_id,
+        'project_code': project_code,
+        'name': name,
+        'status': status,
+        'budget_amount': budget_amount,
+        'total_hours': round(total_hours, 2),
+        'billable_hours': round(billable_hours, 2),
+        'timesheet_cost': round(timesheet_cost, 2),
+        'total_expenses': round(total_expenses, 2),
+        'approved_expenses': round(approved_expenses, 2),
+        'billable_expenses': round(billable_expenses, 2),
+        'total_cost': round(total_cost, 2),
+        'remaining_budget': round(budget_amount - total_cost, 2),
+        'budget_utilization_percent': round(total_cost / budget_amount * 100, 2) if budget_amount > 0 else 0,
+        'tasks': {
+            'total': total_tasks,
+            'open': open_tasks,
+            'overdue': overdue_tasks,
+            'by_state': by_state
+        }
+    }
+
+
+PORTFOLIO_TOTAL_FIELDS = [
+    'budget_amount', 'total_hours', 'billable_hours', 'timesheet_cost', 'total_expenses',
+    'approved_expenses', 'billable_expenses', 'total_cost', 'remaining_budget'
+]
+
+
+def portfolio_totals(rows):
+    totals = {field: round(sum(row[field] for row in rows), 2) for field in PORTFOLIO_TOTAL_FIELDS}
+    totals['projects'] = len(rows)
+    totals['tasks'] = sum(row['tasks']['total'] for row in rows)
+    totals['open_tasks'] = sum(row['tasks']['open'] for row in rows)
+    totals['overdue_tasks'] = sum(row['tasks']['overdue'] for row in rows)
+    return totals
+
+
+def portfolio_report(start_date=None, end_date=None, status=None):
+    """The portfolio report from grouped SQL queries; dates bound timesheets and expenses"""
+    projects = db.session.query(
+        Project.id, Project.project_code, Project.name, Project.status, Project.budget_amount
+    )
+    if status:
+        projects = projects.filter(Project.status == status)
+    projects = projects.order_by(Project.id).all()
+
+    timesheet_filters = []
+    expense_filters = []
+    if start_date:
+        timesheet_filters.append(Timesheet.work_date >= start_date)
+        expense_filters.append(Expense.expense_date >= start_date)
+    if end_date:
+        timesheet_filters.append(Timesheet.work_date <= end_date)
+        expense_filters.append(Expense.expense_date <= end_date)
+
+    timesheet_rows = db.session.query(
+        Timesheet.project_id,
+        func.sum(Timesheet.hours),
+        func.sum(case((Timesheet.billable == True, Timesheet.hours), else_=0)),
+        func.sum(Timesheet.cost_amount)
+    ).filter(*timesheet_filters).group_by(Timesheet.project_id).all()
+    timesheets = {
+        project_id: (float(hours or 0), float(billable or 0), float(cost or 0))
+        for project_id, hours, billable, cost in timesheet_rows
+    }
+
+    expense_rows = db.session.query(
+        Expense.project_id,
+        func.sum(Expense.amount),
+        func.sum(case((Expense.status == 'approved', Expense.amount), else_=0)),
+        func.sum(case((Expense.billable == True, Expense.amount), else_=0))
+    ).filter(*expense_filters).group_by(Expense.project_id).all()
+    expenses = {
+        project_id: (float(amount or 0), float(approved or 0), float(billable or 0))
+        for project_id, amount, approved, billable in expense_rows
+    }
+
+    today = datetime.now().date()
+    is_open = Task.state.notin_(CLOSED_TASK_STATES)
+    task_rows = db.session.query(
+        Task.project_id,
+        Task.state,
+        func.count(Task.id),
+        func.sum(case((is_open, 1), else_=0)),
+        func.sum(case((and_(is_open, Task.due_date < today), 1), else_=0))
+    ).group_by(Task.project_id, Task.state).all()
+    tasks = {}
+    for project_id, state, count, open_count, overdue_count in task_rows:
+        total, open_tasks, overdue, by_state = tasks.setdefault(project_id, (0, 0, 0, {}))
+        by_state[state] = count
+        tasks[project_id] = (total + count, open_tasks + int(open_count or 0), overdue + int(overdue_count or 0), by_state)
+
+    rows = [
+        portfolio_row(
+            project,
+            timesheets.get(project.id, (0.0, 0.0, 0.0)),
+            expenses.get(project.id, (0.0, 0.0, 0.0)),
+            tasks.get(project.id, (0, 0, 0, {}))
+        )
+        for project in projects
+    ]
+    return rows, portfolio_totals(rows)
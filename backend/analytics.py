@@ -1,11 +1,20 @@
-from flask import Blueprint, request, jsonify, session
-from models import db, Project, Task, TaskAssignment, Timesheet, Expense, User
+from flask import Blueprint, Response, current_app, request, jsonify, session, stream_with_context
+from models import db, Project, Task, TaskAssignment, Timesheet, TimesheetDaily, Expense, User
 from sqlalchemy import func, case, extract
 from datetime import datetime, timedelta
 import calendar
+from analytics_cache import cache, cached, flight
+from aggregations import project_summaries, assignment_counts_subquery, project_expense_totals, portfolio_financials, EXPENSE_STATUS
+import aggregations
+import columnar
+from db_routing import read_only
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# Projects per batch summary request, and per group of grouped queries when streaming NDJSON
+MAX_BATCH_SUMMARIES = 1000
+SUMMARY_STREAM_CHUNK = 100
+
 # Helper function to check authentication
 def require_auth():
     if 'user_id' not in session:
@@ -16,6 +25,7 @@ def require_auth():
 # ==================== PROJECT ANALYTICS ====================
 
 @analytics_bp.route('/analytics/projects/overview', methods=['GET'])
+@cached('projects')
 def projects_overview():
     """Get overall project statistics"""
     auth_error = require_auth()
@@ -53,6 +63,7 @@ def projects_overview():
 
 
 @analytics_bp.route('/analytics/projects/<int:project_id>/summary', methods=['GET'])
+@cached('projects', 'project_members', 'tasks', 'timesheets', 'expenses')
 def project_summary(project_id):
     """Get detailed analytics for a specific project"""
     auth_error = require_auth()
@@ -63,106 +74,82 @@ def project_summary(project_id):
     if not project:
         return jsonify({'error': 'Project not found'}), 404
     
-    # Task statistics
-    total_tasks = Task.query.filter_by(project_id=project_id).count()
-    
-    tasks_by_state = db.session.query(
-        Task.state,
-        func.count(Task.id)
-    ).filter(Task.project_id == project_id).group_by(Task.state).all()
-    
-    tasks_by_priority = db.session.query(
-        Task.priority,
-        func.count(Task.id)
-    ).filter(Task.project_id == project_id).group_by(Task.priority).all()
-    
-    # Overdue tasks
-    overdue_tasks = Task.query.filter(
-        Task.project_id == project_id,
-        Task.due_date < datetime.now().date(),
-        Task.state.notin_(['done', 'completed', 'closed'])
-    ).count()
-    
-    # Timesheet statistics
-    total_hours = db.session.query(func.sum(Timesheet.hours)).filter(
-        Timesheet.project_id == project_id
-    ).scalar() or 0
-    
-    billable_hours = db.session.query(func.sum(Timesheet.hours)).filter(
-        Timesheet.project_id == project_id,
-        Timesheet.billable == True
-    ).scalar() or 0
-    
-    total_cost = db.session.query(func.sum(Timesheet.cost_amount)).filter(
-        Timesheet.project_id == project_id
-    ).scalar() or 0
-    
-    # Expense statistics
-    total_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.project_id == project_id
-    ).scalar() or 0
+    # Tasks, timesheets, expenses and members each come from one grouped query
+    summary = project_summaries([project])[project.id]
     
-    approved_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.project_id == project_id,
-        Expense.status == 'approved'
-    ).scalar() or 0
+    return jsonify(summary), 200
+
+
+@analytics_bp.route('/analytics/projects/summary:batch', methods=['POST'])
+@read_only
+def project_summary_batch():
+    """Project summaries for many projects, selected by `project_ids` or by a `filter`
     
-    billable_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.project_id == project_id,
-        Expense.billable == True
-    ).scalar() or 0
+    Each entry has the structure of /analytics/projects/<id>/summary and all of
+    them come from one grouped query per source table. With ?format=ndjson one
+    line per project is streamed, the queries running per chunk of projects.
+    """
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
     
-    # Team members count
-    team_size = len(project.members) + (1 if project.project_manager_id else 0)
+    data = request.get_json(silent=True) or {}
+    export_format = request.args.get('format', 'json')
+    if export_format not in ('json', 'ndjson'):
+        return jsonify({'error': 'format must be json or ndjson'}), 400
+    
+    project_ids = data.get('project_ids')
+    filters = data.get('filter')
+    if (project_ids is None) == (filters is None):
+        return jsonify({'error': 'Provide either project_ids or filter'}), 400
+    
+    query = Project.query
+    if project_ids is not None:
+        if not isinstance(project_ids, list) or not all(isinstance(pid, int) for pid in project_ids):
+            return jsonify({'error': 'project_ids must be a list of integers'}), 400
+        project_ids = list(dict.fromkeys(project_ids))
+        if len(project_ids) > MAX_BATCH_SUMMARIES:
+            return jsonify({'error': 'At most %d projects per request' % MAX_BATCH_SUMMARIES}), 400
+        query = query.filter(Project.id.in_(project_ids))
+    else:
+        if not isinstance(filters, dict) or set(filters) - {'status', 'project_manager_id'}:
+            return jsonify({'error': 'filter supports status and project_manager_id'}), 400
+        if 'status' in filters:
+            query = query.filter(Project.status == filters['status'])
+        if 'project_manager_id' in filters:
+            query = query.filter(Project.project_manager_id == filters['project_manager_id'])
+    
+    projects = query.order_by(Project.id).limit(MAX_BATCH_SUMMARIES + 1).all()
+    if len(projects) > MAX_BATCH_SUMMARIES:
+        return jsonify({'error': 'Filter matches more than %d projects' % MAX_BATCH_SUMMARIES}), 400
+    if project_ids is not None:
+        # Keep the requested order
+        by_id = {p.id: p for p in projects}
+        projects = [by_id[pid] for pid in project_ids if pid in by_id]
+        not_found = [pid for pid in project_ids if pid not in by_id]
+    else:
+        not_found = []
+    
+    if export_format == 'json':
+        summaries = project_summaries(projects)
+        return jsonify({
+            'summaries': [summaries[p.id] for p in projects],
+            'not_found': not_found
+        }), 200
     
-    # Project duration
-    duration_days = None
-    if project.start_date and project.end_date:
-        duration_days = (project.end_date - project.start_date).days
+    def generate():
+        for start in range(0, len(projects), SUMMARY_STREAM_CHUNK):
+            chunk = projects[start:start + SUMMARY_STREAM_CHUNK]
+            summaries = project_summaries(chunk)
+            yield ''.join(current_app.json.dumps(summaries[p.id]) + '\n' for p in chunk)
+        for pid in not_found:
+            yield current_app.json.dumps({'project_id': pid, 'error': 'Project not found'}) + '\n'
     
-    return jsonify({
-        'project': {
-            'id': project.id,
-            'project_code': project.project_code,
-            'name': project.name,
-            'status': project.status,
-            'budget_amount': project.budget_amount,
-            'start_date': project.start_date.isoformat() if project.start_date else None,
-            'end_date': project.end_date.isoformat() if project.end_date else None,
-            'duration_days': duration_days
-        },
-        'team': {
-            'team_size': team_size,
-            'project_manager_id': project.project_manager_id
-        },
-        'tasks': {
-            'total_tasks': total_tasks,
-            'overdue_tasks': overdue_tasks,
-            'by_state': {state: count for state, count in tasks_by_state},
-            'by_priority': {priority: count for priority, count in tasks_by_priority}
-        },
-        'timesheets': {
-            'total_hours': float(total_hours),
-            'billable_hours': float(billable_hours),
-            'non_billable_hours': float(total_hours - billable_hours),
-            'total_cost': float(total_cost)
-        },
-        'expenses': {
-            'total_expenses': float(total_expenses),
-            'approved_expenses': float(approved_expenses),
-            'pending_expenses': float(total_expenses - approved_expenses),
-            'billable_expenses': float(billable_expenses)
-        },
-        'budget_analysis': {
-            'budget_amount': float(project.budget_amount),
-            'total_cost': float(total_cost + total_expenses),
-            'remaining_budget': float(project.budget_amount - (total_cost + total_expenses)),
-            'budget_utilization_percent': round((total_cost + total_expenses) / project.budget_amount * 100, 2) if project.budget_amount > 0 else 0
-        }
-    }), 200
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 @analytics_bp.route('/analytics/projects/timeline', methods=['GET'])
+@cached('projects')
 def projects_timeline():
     """Get project timeline data"""
     auth_error = require_auth()
@@ -191,9 +178,48 @@ def projects_timeline():
     }), 200
 
 
+@analytics_bp.route('/analytics/portfolio', methods=['GET'])
+@cached('projects', 'tasks', 'timesheets', 'expenses', params=('start_date', 'end_date', 'status'))
+def portfolio():
+    """Hours, costs, expenses, budget use and task counts for every project, with portfolio totals
+    
+    Computed from the in-memory columnar snapshot when NumPy is available
+    (COLUMNAR_ANALYTICS), otherwise with grouped SQL queries; both give the
+    same figures. start_date/end_date bound timesheets and expenses.
+    """
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    status = request.args.get('status')
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    engine = columnar if columnar.available() else aggregations
+    rows, totals = engine.portfolio_report(start, end, status)
+    
+    response = jsonify({
+        'projects': rows,
+        'totals': totals,
+        'filters': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'status': status
+        }
+    })
+    response.headers['X-Analytics-Engine'] = 'columnar' if engine is columnar else 'sql'
+    return response, 200
+
+
 # ==================== TASK ANALYTICS ====================
 
 @analytics_bp.route('/analytics/tasks/overview', methods=['GET'])
+@cached('tasks', 'task_assignments')
 def tasks_overview():
     """Get overall task statistics"""
     auth_error = require_auth()
@@ -245,6 +271,7 @@ def tasks_overview():
 
 
 @analytics_bp.route('/analytics/tasks/user/<int:user_id>', methods=['GET'])
+@cached('users', 'tasks', 'task_assignments')
 def user_task_analytics(user_id):
     """Get task analytics for a specific user"""
     auth_error = require_auth()
@@ -309,6 +336,7 @@ def user_task_analytics(user_id):
 
 
 @analytics_bp.route('/analytics/tasks/project/<int:project_id>/timeline', methods=['GET'])
+@cached('projects', 'tasks', 'task_assignments')
 def project_task_timeline(project_id):
     """Get task timeline for a project"""
     auth_error = require_auth()
@@ -319,7 +347,15 @@ def project_task_timeline(project_id):
     if not project:
         return jsonify({'error': 'Project not found'}), 404
     
-    tasks = Task.query.filter_by(project_id=project_id).filter(
+    # Assignment counts are joined in rather than loading each task's collection
+    assignment_counts = assignment_counts_subquery(project_id)
+    tasks = db.session.query(
+        Task,
+        func.coalesce(assignment_counts.c.count, 0)
+    ).outerjoin(
+        assignment_counts, assignment_counts.c.task_id == Task.id
+    ).filter(
+        Task.project_id == project_id,
         Task.due_date.isnot(None)
     ).order_by(Task.due_date).all()
     
@@ -331,8 +367,8 @@ def project_task_timeline(project_id):
         'due_date': t.due_date.isoformat(),
         'created_at': t.created_at.isoformat(),
         'is_overdue': t.due_date < datetime.now().date() and t.state not in ['done', 'completed', 'closed'],
-        'assigned_users_count': len(t.assignments)
-    } for t in tasks]
+        'assigned_users_count': assigned_users_count
+    } for t, assigned_users_count in tasks]
     
     return jsonify({
         'project_id': project_id,
@@ -345,6 +381,7 @@ def project_task_timeline(project_id):
 # ==================== TIMESHEET ANALYTICS ====================
 
 @analytics_bp.route('/analytics/timesheets/overview', methods=['GET'])
+@cached('projects', 'timesheets')
 def timesheets_overview():
     """Get overall timesheet statistics"""
     auth_error = require_auth()
@@ -407,6 +444,7 @@ def timesheets_overview():
 
 
 @analytics_bp.route('/analytics/timesheets/user/<int:user_id>', methods=['GET'])
+@cached('users', 'projects', 'timesheets')
 def user_timesheet_analytics(user_id):
     """Get timesheet analytics for a specific user"""
     auth_error = require_auth()
@@ -479,6 +517,7 @@ def user_timesheet_analytics(user_id):
 
 
 @analytics_bp.route('/analytics/timesheets/project/<int:project_id>', methods=['GET'])
+@cached('projects', 'users', 'tasks', 'timesheets')
 def project_timesheet_analytics(project_id):
     """Get timesheet analytics for a specific project"""
     auth_error = require_auth()
@@ -548,9 +587,110 @@ def project_timesheet_analytics(project_id):
     }), 200
 
 
+SERIES_BUCKETS = ('day', 'week', 'month')
+SERIES_GROUPS = {
+    'user': TimesheetDaily.user_id,
+    'project': TimesheetDaily.project_id,
+    'task': TimesheetDaily.task_id
+}
+
+
+def _bucket_start(day, bucket):
+    """First day of the day/week (ISO, Monday)/month bucket containing `day`"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+@analytics_bp.route('/analytics/timesheets/series', methods=['GET'])
+@cached('timesheets', 'timesheet_daily', params=('start_date', 'end_date', 'bucket', 'group_by', 'project_id', 'user_id'))
+def timesheet_series():
+    """Timesheet hours per day, week or month, optionally one series per user, project or task
+    
+    Read from the timesheet_daily rollup: one range scan over (work_date, ...)
+    returns at most one row per day and group, which are folded into buckets here.
+    """
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    bucket = request.args.get('bucket', 'week')
+    group_by = request.args.get('group_by')
+    if bucket not in SERIES_BUCKETS:
+        return jsonify({'error': 'bucket must be one of %s' % ', '.join(SERIES_BUCKETS)}), 400
+    if group_by is not None and group_by not in SERIES_GROUPS:
+        return jsonify({'error': 'group_by must be one of %s' % ', '.join(SERIES_GROUPS)}), 400
+    
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    project_id = request.args.get('project_id', type=int)
+    user_id = request.args.get('user_id', type=int)
+    
+    filters = []
+    try:
+        if start_date:
+            filters.append(TimesheetDaily.work_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            filters.append(TimesheetDaily.work_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    if project_id is not None:
+        filters.append(TimesheetDaily.project_id == project_id)
+    if user_id is not None:
+        filters.append(TimesheetDaily.user_id == user_id)
+    
+    group_column = SERIES_GROUPS[group_by] if group_by else None
+    key_columns = [TimesheetDaily.work_date] + ([group_column] if group_by else [])
+    rows = db.session.query(
+        *key_columns,
+        func.sum(TimesheetDaily.hours),
+        func.sum(case((TimesheetDaily.billable == True, TimesheetDaily.hours), else_=0)),
+        func.sum(TimesheetDaily.cost_amount),
+        func.sum(TimesheetDaily.entry_count)
+    ).filter(*filters).group_by(*key_columns).all()
+    
+    # {group: {bucket start: [hours, billable hours, cost, entries]}}
+    series = {}
+    for row in rows:
+        work_date, group = row[0], (row[1] if group_by else None)
+        hours, billable_hours, cost, entries = row[-4:]
+        point = series.setdefault(group, {}).setdefault(_bucket_start(work_date, bucket), [0.0, 0.0, 0.0, 0])
+        point[0] += hours or 0
+        point[1] += billable_hours or 0
+        point[2] += cost or 0
+        point[3] += entries or 0
+    
+    result = []
+    for group in sorted(series, key=lambda value: (value is None, value)):
+        entry = {'%s_id' % group_by: group} if group_by else {}
+        entry['points'] = [{
+            'period_start': period.isoformat(),
+            'hours': round(hours, 2),
+            'billable_hours': round(billable_hours, 2),
+            'cost': round(cost, 2),
+            'entries': entries
+        } for period, (hours, billable_hours, cost, entries) in sorted(series[group].items())]
+        result.append(entry)
+    
+    return jsonify({
+        'bucket': bucket,
+        'group_by': group_by,
+        'series': result,
+        'filters': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'project_id': project_id,
+            'user_id': user_id
+        }
+    }), 200
+
+
 # ==================== EXPENSE ANALYTICS ====================
 
 @analytics_bp.route('/analytics/expenses/overview', methods=['GET'])
+@cached('projects', 'expenses')
 def expenses_overview():
     """Get overall expense statistics"""
     auth_error = require_auth()
@@ -574,14 +714,14 @@ def expenses_overview():
     
     # Expenses by status
     expenses_by_status = db.session.query(
-        Expense.status,
+        EXPENSE_STATUS,
         func.sum(Expense.amount)
     )
     if start_date:
         expenses_by_status = expenses_by_status.filter(Expense.expense_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
     if end_date:
         expenses_by_status = expenses_by_status.filter(Expense.expense_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    expenses_by_status = expenses_by_status.group_by(Expense.status).all()
+    expenses_by_status = expenses_by_status.group_by(EXPENSE_STATUS).all()
     
     # Billable vs non-billable
     billable_expenses = db.session.query(func.sum(Expense.amount)).filter(
@@ -620,6 +760,7 @@ def expenses_overview():
 
 
 @analytics_bp.route('/analytics/expenses/user/<int:user_id>', methods=['GET'])
+@cached('users', 'projects', 'expenses')
 def user_expense_analytics(user_id):
     """Get expense analytics for a specific user"""
     auth_error = require_auth()
@@ -647,7 +788,7 @@ def user_expense_analytics(user_id):
     
     # Expenses by status
     expenses_by_status = db.session.query(
-        Expense.status,
+        EXPENSE_STATUS,
         func.sum(Expense.amount),
         func.count(Expense.id)
     ).filter(Expense.submitted_by == user_id)
@@ -657,7 +798,7 @@ def user_expense_analytics(user_id):
     if end_date:
         expenses_by_status = expenses_by_status.filter(Expense.expense_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
     
-    expenses_by_status = expenses_by_status.group_by(Expense.status).all()
+    expenses_by_status = expenses_by_status.group_by(EXPENSE_STATUS).all()
     
     # Expenses by project
     expenses_by_project = db.session.query(
@@ -691,6 +832,7 @@ def user_expense_analytics(user_id):
 
 
 @analytics_bp.route('/analytics/expenses/project/<int:project_id>', methods=['GET'])
+@cached('projects', 'users', 'expenses')
 def project_expense_analytics(project_id):
     """Get expense analytics for a specific project"""
     auth_error = require_auth()
@@ -705,30 +847,36 @@ def project_expense_analytics(project_id):
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Expense.query.filter_by(project_id=project_id)
-    
-    if start_date:
-        query = query.filter(Expense.expense_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Expense.expense_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    total_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        query.whereclause
-    ).scalar() or 0
-    
-    # Expenses by status
-    expenses_by_status = db.session.query(
-        Expense.status,
-        func.sum(Expense.amount),
-        func.count(Expense.id)
-    ).filter(Expense.project_id == project_id)
-    
-    if start_date:
-        expenses_by_status = expenses_by_status.filter(Expense.expense_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        expenses_by_status = expenses_by_status.filter(Expense.expense_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    expenses_by_status = expenses_by_status.group_by(Expense.status).all()
+    # Unfiltered totals are served from the project_financials rollup
+    rolled_up = None if (start_date or end_date) else project_expense_totals(project_id)
+    
+    if rolled_up:
+        total_expenses, expenses_by_status = rolled_up
+    else:
+        query = Expense.query.filter_by(project_id=project_id)
+        
+        if start_date:
+            query = query.filter(Expense.expense_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            query = query.filter(Expense.expense_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+        
+        total_expenses = db.session.query(func.sum(Expense.amount)).filter(
+            query.whereclause
+        ).scalar() or 0
+        
+        # Expenses by status
+        expenses_by_status = db.session.query(
+            EXPENSE_STATUS,
+            func.sum(Expense.amount),
+            func.count(Expense.id)
+        ).filter(Expense.project_id == project_id)
+        
+        if start_date:
+            expenses_by_status = expenses_by_status.filter(Expense.expense_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            expenses_by_status = expenses_by_status.filter(Expense.expense_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+        
+        expenses_by_status = expenses_by_status.group_by(EXPENSE_STATUS).all()
     
     # Expenses by user
     expenses_by_user = db.session.query(
@@ -771,6 +919,7 @@ def project_expense_analytics(project_id):
 # ==================== COMBINED ANALYTICS ====================
 
 @analytics_bp.route('/analytics/dashboard', methods=['GET'])
+@cached('projects', 'tasks', 'timesheets', 'expenses')
 def analytics_dashboard():
     """Get combined analytics dashboard"""
     auth_error = require_auth()
@@ -788,15 +937,21 @@ def analytics_dashboard():
         Task.state.notin_(['done', 'completed', 'closed'])
     ).count()
     
-    # Timesheet stats
-    total_hours = db.session.query(func.sum(Timesheet.hours)).scalar() or 0
-    total_cost = db.session.query(func.sum(Timesheet.cost_amount)).scalar() or 0
-    
-    # Expense stats
-    total_expenses = db.session.query(func.sum(Expense.amount)).scalar() or 0
-    pending_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.status == 'pending'
-    ).scalar() or 0
+    # Timesheet and expense stats come from the project_financials rollup
+    financials = portfolio_financials(total_projects)
+    if financials:
+        total_hours = financials['total_hours']
+        total_cost = financials['total_cost']
+        total_expenses = financials['total_expenses']
+        pending_expenses = financials['pending_expenses']
+    else:
+        # Rollup not built for every project yet, scan the base tables
+        total_hours = db.session.query(func.sum(Timesheet.hours)).scalar() or 0
+        total_cost = db.session.query(func.sum(Timesheet.cost_amount)).scalar() or 0
+        total_expenses = db.session.query(func.sum(Expense.amount)).scalar() or 0
+        pending_expenses = db.session.query(func.sum(Expense.amount)).filter(
+            EXPENSE_STATUS == 'pending'
+        ).scalar() or 0
     
     # Total budget
     total_budget = db.session.query(func.sum(Project.budget_amount)).scalar() or 0
@@ -825,3 +980,17 @@ def analytics_dashboard():
             'remaining_budget': float(total_budget - (total_cost + total_expenses))
         }
     }), 200
+
+
+# ==================== CACHE STATISTICS ====================
+
+@analytics_bp.route('/analytics/cache/stats', methods=['GET'])
+def analytics_cache_stats():
+    """Get hit/miss/eviction counters for the analytics response cache and request coalescing"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    stats = cache.stats()
+    stats['single_flight'] = flight.stats()
+    return jsonify(stats), 200
@@ -0,0 +1,219 @@
+from flask import request, session, current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from functools import wraps
+from single_flight import SingleFlight
+import os
+import threading
+import time
+
+
+# ==================== CACHE STORE ====================
+
+class AnalyticsCache:
+    """In-process LRU cache with per-entry TTL and table-based invalidation
+
+    Each entry remembers the tables it was computed from. Committing a change to
+    any of those tables drops the entry. A per-table generation counter stops a
+    computation that raced with a commit from storing its (stale) result.
+    """
+
+    def __init__(self, max_entries=512, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._committed_at = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self, tables):
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def last_commit(self, tables):
+        """Wall-clock time of this process's last commit to any of `tables` (0 if none)"""
+        with self._lock:
+            return max((self._committed_at.get(table, 0) for table in tables), default=0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, tables, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tables, generation):
+        with self._lock:
+            if tuple(self._generations.get(table, 0) for table in tables) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_tables(self, tables):
+        tables = set(tables)
+        now = time.time()
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                self._committed_at[table] = now
+            stale = [key for key, (_, deps, _) in self._entries.items() if deps & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate_percent': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+cache = AnalyticsCache()
+flight = SingleFlight()
+
+
+def init_app(app):
+    """Size the cache and set up request coalescing from app config"""
+    cache.max_entries = app.config.get('ANALYTICS_CACHE_MAX_ENTRIES', 512)
+    cache.ttl = app.config.get('ANALYTICS_CACHE_TTL', 30)
+    cache.enabled = app.config.get('ANALYTICS_CACHE_ENABLED', True)
+    flight.configure(
+        app.config.get('ANALYTICS_SINGLE_FLIGHT', True),
+        app.config.get('ANALYTICS_SINGLE_FLIGHT_DIR') or os.path.join(app.instance_path, 'single_flight'),
+        app.config.get('ANALYTICS_SINGLE_FLIGHT_TIMEOUT', 30),
+        namespace=app.config.get('SQLALCHEMY_DATABASE_URI')
+    )
+
+
+# ==================== VIEW DECORATOR ====================
+
+# Set from the body and status when a shared response is rebuilt
+_UNSHARED_HEADERS = ('Content-Length', 'Content-Type', 'X-Cache')
+
+def _cache_key(params):
+    view_args = tuple(sorted((request.view_args or {}).items()))
+    query = tuple((name, request.args.get(name)) for name in params)
+    return (request.endpoint, view_args, query)
+
+
+def cached(*tables, params=('start_date', 'end_date')):
+    """Cache a GET analytics view's 200 responses until one of `tables` changes
+
+    On a miss, concurrent requests for the same key (in this process, and in
+    other processes through single_flight) wait for one computation and share
+    its response; they are answered with `X-Cache: COALESCED`. Unauthenticated
+    requests skip the cache so the view still reports 401.
+
+    The cache lives in each worker process. A commit invalidates entries only
+    in the process that made it; other workers keep serving their entry until
+    its TTL (ANALYTICS_CACHE_TTL, default 30 seconds) runs out.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not cache.enabled or 'user_id' not in session:
+                return view(*args, **kwargs)
+
+            key = _cache_key(params)
+            entry = cache.get(key)
+            if entry is not None:
+                body, mimetype = entry
+                response = current_app.response_class(body, status=200, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            generation = cache.generation(tables)
+
+            def compute():
+                response = current_app.make_response(view(*args, **kwargs))
+                return response.get_data(), {
+                    'status': response.status_code,
+                    'mimetype': response.mimetype,
+                    'headers': [item for item in response.headers.items() if item[0] not in _UNSHARED_HEADERS]
+                }
+
+            # Only computations that started after this process's last commit to `tables` are
+            # shared: same generation within the process, later start time across processes
+            (body, metadata), coalesced = flight.do(
+                key, compute, generation=generation, not_before=cache.last_commit(tables)
+            )
+            if metadata['status'] == 200 and not coalesced:
+                cache.set(key, (body, metadata['mimetype']), tables, generation)
+            response = current_app.response_class(body, status=metadata['status'], mimetype=metadata['mimetype'])
+            response.headers.extend(metadata['headers'])
+            response.headers['X-Cache'] = 'COALESCED' if coalesced else 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+# ==================== WRITE-DRIVEN INVALIDATION ====================
+
+def mark_tables_dirty(session, *tables):
+    """Record tables written outside the ORM unit of work so the commit invalidates them"""
+    session.info.setdefault('analytics_dirty_tables', set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_dirty_tables(session, flush_context):
+    tables = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if hasattr(obj, '__table__')
+    }
+    if tables:
+        mark_tables_dirty(session, *tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_dml_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            mark_tables_dirty(orm_execute_state.session, table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    tables = session.info.pop('analytics_dirty_tables', None)
+    if tables:
+        cache.invalidate_tables(tables)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_on_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('analytics_dirty_tables', None)
@@ -0,0 +1,116 @@
+"""Portfolio report: grouped SQL queries vs. the NumPy columnar snapshot
+
+Seeds projects with tasks, timesheets and expenses, then times the SQL
+engine, a cold columnar load, an incremental refresh after inserting new
+timesheets, and warm columnar reports. Both engines must return the same rows.
+
+    python benchmarks/columnar_portfolio.py --projects 2000 --repeat 5
+"""
+import os
+import sys
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, User, Project, Task, Timesheet, Expense
+import app as app_module
+import aggregations
+import columnar
+import commands
+
+STATES = ['todo', 'in_progress', 'review', 'done', 'cancelled']
+PRIORITIES = ['low', 'medium', 'high']
+
+
+def build_app(path, projects, tasks, entries):
+    app = app_module.create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///%s' % path,
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'PASSWORD_HASH_WORKERS': 0,
+        'METRICS_ENABLED': False
+    })
+    random.seed(1)
+    start = date(2025, 1, 1)
+    with app.app_context():
+        commands.init_db()
+        user = User(email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.execute(Project.__table__.insert(), [{
+            'project_code': 'C%d' % i, 'name': 'Columnar %d' % i, 'status': random.choice(['planning', 'active', 'closed']),
+            'budget_amount': random.randint(0, 100000)
+        } for i in range(projects)])
+        db.session.execute(Task.__table__.insert(), [{
+            'project_id': p + 1, 'title': 't', 'state': random.choice(STATES), 'priority': random.choice(PRIORITIES),
+            'due_date': start + timedelta(days=random.randint(0, 700)), 'created_by': user.id
+        } for p in range(projects) for _ in range(tasks)])
+        db.session.execute(Timesheet.__table__.insert(), [{
+            'project_id': p + 1, 'user_id': user.id, 'work_date': start + timedelta(days=random.randint(0, 365)),
+            'hours': random.choice([1, 2.5, 4, 8]), 'billable': random.random() < 0.7, 'internal_cost_rate': 50,
+            'cost_amount': 100
+        } for p in range(projects) for _ in range(entries)])
+        db.session.execute(Expense.__table__.insert(), [{
+            'project_id': p + 1, 'submitted_by': user.id, 'expense_date': start + timedelta(days=random.randint(0, 365)),
+            'description': 'e', 'amount': random.randint(1, 500), 'billable': random.random() < 0.5,
+            'status': random.choice(['pending', 'approved', 'rejected'])
+        } for p in range(projects) for _ in range(max(1, entries // 4))])
+        db.session.commit()
+    return app
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=2000)
+    parser.add_argument('--tasks', type=int, default=20, help='Tasks per project')
+    parser.add_argument('--entries', type=int, default=40, help='Timesheets per project (a quarter as many expenses)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    if columnar.np is None:
+        sys.exit('NumPy is not installed')
+
+    path = os.path.join(tempfile.mkdtemp(), 'columnar.db')
+    app = build_app(path, args.projects, args.tasks, args.entries)
+    filters = {'start_date': date(2025, 3, 1), 'end_date': date(2025, 9, 30)}
+    with app.app_context():
+        sql, sql_ms = timed(lambda: aggregations.portfolio_report(**filters), args.repeat)
+
+        started = time.perf_counter()
+        columnar.snapshot.refresh()
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        db.session.execute(Timesheet.__table__.insert(), [{
+            'project_id': random.randint(1, args.projects), 'user_id': 1, 'work_date': date(2025, 6, 1),
+            'hours': 2, 'billable': True, 'internal_cost_rate': 50, 'cost_amount': 100
+        } for _ in range(100)])
+        db.session.commit()
+        started = time.perf_counter()
+        columnar.snapshot.refresh()
+        refresh_ms = (time.perf_counter() - started) * 1000
+
+        sql, sql_ms = timed(lambda: aggregations.portfolio_report(**filters), args.repeat)
+        warm, warm_ms = timed(lambda: columnar.portfolio_report(**filters), args.repeat)
+        assert warm == sql, 'columnar and SQL reports differ'
+
+    print('rows: %s' % columnar.snapshot.stats())
+    print('%-28s %10s' % ('step', 'ms'))
+    for label, ms in (('sql report', sql_ms), ('columnar cold load', cold_ms),
+                      ('columnar refresh (+100 rows)', refresh_ms), ('columnar report (warm)', warm_ms)):
+        print('%-28s %10.1f' % (label, ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Login latency under concurrency with password hashing inline vs. in the process pool
+
+Login threads post to /login back to back while one bystander thread keeps
+requesting GET /projects with an established session. Inline hashing holds
+the GIL for the whole KDF, so the bystander waits behind every login; with
+the pool it only waits for its own turn on the CPU.
+
+    python benchmarks/login_latency.py --seconds 5 --logins 8 --workers 4
+"""
+import os
+import sys
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from models import db, User, Project
+import app as app_module
+import commands
+
+USERS = 20
+PASSWORD = 'bench-password'
+
+
+def build_app(path, method, workers, max_pending):
+    app = app_module.create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///%s' % path,
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_WORKERS': workers,
+        'PASSWORD_HASH_MAX_PENDING': max_pending,
+        'METRICS_ENABLED': False
+    })
+    with app.app_context():
+        commands.init_db()
+        if not db.session.query(User.id).first():
+            # Hashed with the configured method up front so logins measure verification, not rehashing
+            password_hash = generate_password_hash(PASSWORD, method=method)
+            db.session.add_all([
+                User(email='bench%d@example.com' % i, password_hash=password_hash) for i in range(USERS)
+            ])
+            db.session.add_all([Project(project_code='B%d' % i, name='Bench %d' % i) for i in range(50)])
+            db.session.commit()
+    return app
+
+
+def login_loop(app, index, stop, samples, statuses):
+    client = app.test_client()
+    email = 'bench%d@example.com' % (index % USERS)
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = client.post('/login', json={'email': email, 'password': PASSWORD})
+        samples.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+def bystander_loop(app, stop, samples):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+    while not stop.is_set():
+        started = time.perf_counter()
+        client.get('/projects')
+        samples.append(time.perf_counter() - started)
+
+
+def percentiles(samples):
+    values = sorted(sample * 1000 for sample in samples)
+    if not values:
+        return (0, 0, 0, 0)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return (statistics.median(values), pick(0.95), pick(0.99), values[-1])
+
+
+def run(path, method, workers, max_pending, seconds, logins):
+    app = build_app(path, method, workers, max_pending)
+    # Start the pool before timing so worker start-up is not counted
+    app.test_client().post('/login', json={'email': 'bench0@example.com', 'password': PASSWORD})
+
+    stop = threading.Event()
+    login_samples = []
+    bystander_samples = []
+    statuses = {}
+    threads = [threading.Thread(target=login_loop, args=(app, i, stop, login_samples, statuses)) for i in range(logins)]
+    threads.append(threading.Thread(target=bystander_loop, args=(app, stop, bystander_samples)))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return login_samples, bystander_samples, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--logins', type=int, default=8, help='Concurrent login threads')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='Hashing processes in pool mode')
+    parser.add_argument('--max-pending', type=int, default=32)
+    parser.add_argument('--method', default='scrypt')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'login.db')
+    print('%-8s %-10s %8s %9s %9s %9s %9s %8s' % ('mode', 'requests', 'count', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'non-200'))
+    for mode, workers in (('inline', 0), ('pool', args.workers)):
+        logins, bystander, statuses = run(path, args.method, workers, args.max_pending, args.seconds, args.logins)
+        failed = sum(count for status, count in statuses.items() if status != 200)
+        for label, samples, errors in (('login', logins, failed), ('projects', bystander, '')):
+            print('%-8s %-10s %8d %9.1f %9.1f %9.1f %9.1f %8s' % ((mode, label, len(samples)) + percentiles(samples) + (errors,)))
+
+
+if __name__ == '__main__':
+    main()
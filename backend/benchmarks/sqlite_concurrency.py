@@ -0,0 +1,143 @@
+"""Mixed read/write throughput on SQLite with default settings vs. tuned mode
+
+Runs the same workload twice against a fresh database file: writer threads
+log timesheets through the ORM (so the project_financials rollup is updated
+in the same transaction) while reader threads run analytics-style aggregates.
+
+    python benchmarks/sqlite_concurrency.py --seconds 5 --writers 4 --readers 8
+"""
+import os
+import sys
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from models import db, User, Project, Task, Timesheet, ProjectFinancial
+import rollups
+import sqlite_tuning
+
+PROJECTS = 20
+TASKS_PER_PROJECT = 25
+SEED_TIMESHEETS = 20000
+
+
+def build_engine(path, tuned, local):
+    engine = create_engine('sqlite:///%s' % path)
+    if tuned:
+        sqlite_tuning.configure_engine(engine, immediate=lambda: getattr(local, 'writer', False))
+    return engine
+
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, email='bench@example.com', password_hash='x'))
+        for p in range(1, PROJECTS + 1):
+            session.add(Project(id=p, project_code='B%d' % p, name='Bench %d' % p))
+        session.flush()
+        for p in range(1, PROJECTS + 1):
+            for t in range(TASKS_PER_PROJECT):
+                session.add(Task(project_id=p, title='task', created_by=1))
+        session.commit()
+        rows = [{
+            'project_id': random.randint(1, PROJECTS), 'user_id': 1, 'hours': 1.0, 'billable': True,
+            'work_date': date(2025, 1, 1) + timedelta(days=random.randint(0, 180)),
+            'internal_cost_rate': 50.0, 'cost_amount': 50.0
+        } for _ in range(SEED_TIMESHEETS)]
+        session.execute(Timesheet.__table__.insert(), rows)
+        rollups.apply_timesheet_rows(session.connection(), rows)
+        session.commit()
+
+
+def writer(engine, local, stop, stats):
+    local.writer = True
+    while not stop.is_set():
+        try:
+            with Session(engine) as session:
+                project_id = random.randint(1, PROJECTS)
+                task_id = session.scalar(select(Task.id).where(Task.project_id == project_id).limit(1))
+                hours = random.choice([0.5, 1.0, 2.0])
+                session.add(Timesheet(
+                    project_id=project_id, task_id=task_id, user_id=1, hours=hours, billable=True,
+                    work_date=date(2025, 1, 1) + timedelta(days=random.randint(0, 180)),
+                    internal_cost_rate=50.0, cost_amount=hours * 50.0
+                ))
+                session.commit()
+            stats['writes'] += 1
+        except OperationalError:
+            stats['write_errors'] += 1
+
+
+def reader(engine, local, stop, stats):
+    local.writer = False
+    while not stop.is_set():
+        try:
+            with Session(engine) as session:
+                start = date(2025, 1, 1) + timedelta(days=random.randint(0, 150))
+                session.execute(
+                    select(Timesheet.project_id, func.sum(Timesheet.hours))
+                    .where(Timesheet.work_date.between(start, start + timedelta(days=30)))
+                    .group_by(Timesheet.project_id)
+                ).all()
+                session.execute(select(ProjectFinancial)).all()
+            stats['reads'] += 1
+        except OperationalError:
+            stats['read_errors'] += 1
+
+
+def run(tuned, seconds, writers, readers):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.db')
+    local = threading.local()
+    engine = build_engine(path, tuned, local)
+    seed(engine)
+
+    stop = threading.Event()
+    results = []
+    threads = []
+    for target, count in ((writer, writers), (reader, readers)):
+        for _ in range(count):
+            stats = {'writes': 0, 'write_errors': 0, 'reads': 0, 'read_errors': 0}
+            results.append(stats)
+            threads.append(threading.Thread(target=target, args=(engine, local, stop, stats)))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    totals = {key: sum(stats[key] for stats in results) for key in results[0]}
+    totals['writes_per_sec'] = round(totals['writes'] / seconds, 1)
+    totals['reads_per_sec'] = round(totals['reads'] / seconds, 1)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    args = parser.parse_args()
+
+    print('%-8s %10s %10s %12s %12s' % ('mode', 'writes/s', 'reads/s', 'write errs', 'read errs'))
+    for tuned in (False, True):
+        totals = run(tuned, args.seconds, args.writers, args.readers)
+        print('%-8s %10s %10s %12s %12s' % (
+            'tuned' if tuned else 'default', totals['writes_per_sec'], totals['reads_per_sec'],
+            totals['write_errors'], totals['read_errors']
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Cold start time of one app worker: import, app construction and first request
+
+Each run is a fresh interpreter, as for a gunicorn worker started without
+--preload, pointed at an already initialised database. The target uses
+gunicorn's syntax, so an older checkout can be measured with --app-dir and
+--target app:app for comparison.
+
+    python benchmarks/startup.py --runs 10
+"""
+import os
+import sys
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the fresh interpreter; prints the phase timings as JSON
+WORKER_SCRIPT = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, APP_DIR)
+module_name, _, expression = TARGET.partition(':')
+module = __import__(module_name)
+imported = time.perf_counter()
+app = eval(expression, vars(module))
+created = time.perf_counter()
+response = app.test_client().post('/login', json={'email': 'nobody@example.com', 'password': 'x'})
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create': created - imported,
+    'first_request': served - created,
+    'total': served - started,
+    'status': response.status_code
+}))
+'''
+
+
+def run_worker(app_dir, target, env):
+    code = 'APP_DIR = %r\nTARGET = %r\n' % (app_dir, target) + WORKER_SCRIPT
+    result = subprocess.run([sys.executable, '-c', code], cwd=app_dir, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def init_database(app_dir, env):
+    # A worker never creates the schema itself; do it once up front like a deploy step would
+    result = subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+        cwd=app_dir, env=env, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--app-dir', default=BACKEND_DIR)
+    parser.add_argument('--target', default='app:create_app()', help='gunicorn-style module:expression')
+    parser.add_argument('--skip-init', action='store_true', help='Do not run init-db first (targets that build the schema on import)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///%s' % os.path.join(tempfile.mkdtemp(), 'startup.db')
+    if not args.skip_init:
+        init_database(args.app_dir, env)
+
+    # The first run warms the bytecode cache and creates the database for --skip-init targets
+    run_worker(args.app_dir, args.target, env)
+    samples = [run_worker(args.app_dir, args.target, env) for _ in range(args.runs)]
+
+    print('%-14s %10s %10s' % ('phase', 'median ms', 'max ms'))
+    for phase in ('import', 'create', 'first_request', 'total'):
+        values = [sample[phase] * 1000 for sample in samples]
+        print('%-14s %10.1f %10.1f' % (phase, statistics.median(values), max(values)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+from models import db, Project, Task, Timesheet, Expense, TableVersion
+from aggregations import CLOSED_TASK_STATES, portfolio_row, portfolio_totals
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from datetime import datetime
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional; analytics fall back to the SQL engine
+    np = None
+
+
+# Columns kept per table. Kinds: int, float, bool, date (datetime64[D], NaT for
+# NULL), category (integer codes into a per-column value list) and text.
+SNAPSHOT_COLUMNS = {
+    'projects': (Project, [
+        ('id', 'int'), ('project_code', 'text'), ('name', 'text'), ('status', 'category'),
+        ('budget_amount', 'float'), ('start_date', 'date'), ('end_date', 'date')
+    ]),
+    'tasks': (Task, [
+        ('id', 'int'), ('project_id', 'int'), ('state', 'category'), ('priority', 'category'), ('due_date', 'date')
+    ]),
+    'timesheets': (Timesheet, [
+        ('id', 'int'), ('project_id', 'int'), ('user_id', 'int'), ('task_id', 'int'), ('work_date', 'date'),
+        ('hours', 'float'), ('billable', 'bool'), ('cost_amount', 'float')
+    ]),
+    'expenses': (Expense, [
+        ('id', 'int'), ('project_id', 'int'), ('expense_date', 'date'), ('amount', 'float'),
+        ('billable', 'bool'), ('status', 'category')
+    ])
+}
+
+
+# ==================== CATEGORY CODES ====================
+
+class Categories:
+    """Maps the distinct values of a text column (None included) to stable integer codes"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values):
+        return np.fromiter((self.code(value) for value in values), dtype=np.int32, count=len(values))
+
+    def lookup(self, value):
+        """Code of `value`, or -1 (matches nothing) when it never occurred"""
+        return self.codes.get(value, -1)
+
+
+# ==================== TABLE SNAPSHOT ====================
+
+class TableSnapshot:
+    """One table held as NumPy arrays, ordered by id
+
+    `refresh` appends rows with a higher id than any loaded, rewrites rows
+    whose updated_at moved (tables that have one) and reloads everything when
+    the row count no longer matches, i.e. after deletes.
+    """
+
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = columns
+        self.tracks_updates = hasattr(model, 'updated_at')
+        self.clear()
+
+    def clear(self):
+        self.categories = {name: Categories() for name, kind in self.columns if kind == 'category'}
+        self.arrays = self._encode([])
+        self.max_id = 0
+        self.max_updated_at = None
+
+    def __len__(self):
+        return len(self.arrays['id'])
+
+    def _query(self):
+        columns = [getattr(self.model, name) for name, _ in self.columns]
+        if self.tracks_updates:
+            columns.append(self.model.updated_at)
+        return db.session.query(*columns).order_by(self.model.id)
+
+    def _encode(self, rows):
+        arrays = {}
+        for position, (name, kind) in enumerate(self.columns):
+            values = [row[position] for row in rows]
+            if kind == 'int':
+                arrays[name] = np.array([-1 if value is None else value for value in values], dtype=np.int64)
+            elif kind == 'float':
+                arrays[name] = np.array(values, dtype=np.float64)
+            elif kind == 'bool':
+                arrays[name] = np.array([value is True for value in values], dtype=bool)
+            elif kind == 'date':
+                arrays[name] = np.array(values, dtype='datetime64[D]')
+            elif kind == 'category':
+                arrays[name] = self.categories[name].encode(values)
+            else:
+                arrays[name] = np.array(values, dtype=object)
+        return arrays
+
+    def _track(self, rows):
+        if rows:
+            self.max_id = max(self.max_id, rows[-1][0])
+            if self.tracks_updates:
+                stamps = [row[-1] for row in rows if row[-1] is not None]
+                if stamps:
+                    self.max_updated_at = max(stamps + [self.max_updated_at or stamps[0]])
+
+    def load(self):
+        self.clear()
+        rows = self._query().all()
+        self.arrays = self._encode(rows)
+        self._track(rows)
+
+    def refresh(self):
+        count, max_id = db.session.query(func.count(self.model.id), func.max(self.model.id)).one()
+        loaded_max_id = self.max_id
+
+        if self.tracks_updates and self.max_updated_at is not None:
+            # >= so rows stamped in the same instant as the last refresh are not missed; rewriting is idempotent
+            changed = self._query().filter(
+                self.model.id <= loaded_max_id,
+                self.model.updated_at >= self.max_updated_at
+            ).all()
+            if changed:
+                positions = np.searchsorted(self.arrays['id'], [row[0] for row in changed])
+                for name, values in self._encode(changed).items():
+                    self.arrays[name][positions] = values
+                self._track(changed)
+                self.max_id = loaded_max_id
+
+        if (max_id or 0) > loaded_max_id:
+            added = self._query().filter(self.model.id > loaded_max_id).all()
+            for name, values in self._encode(added).items():
+                self.arrays[name] = np.concatenate([self.arrays[name], values])
+            self._track(added)
+
+        if len(self) != count:
+            self.load()
+
+
+# ==================== SNAPSHOT ====================
+
+class ColumnarSnapshot:
+    """Projects, tasks, timesheets and expenses as columns, refreshed incrementally before each report
+
+    Edits and deletes committed through a session mark their table for a full
+    reload: in this process directly, and in every process through the
+    table's counter in table_versions, which each refresh reads (one small
+    query). Writes that bypass the session (raw SQL, other programs) are
+    picked up by the periodic full reload every `max_age` seconds. Inserts
+    are seen on the next refresh. Hold `lock` while refreshing and reading the arrays.
+    """
+
+    def __init__(self, max_age=30):
+        self.max_age = max_age
+        self.enabled = True
+        self.tables = {name: TableSnapshot(model, columns) for name, (model, columns) in SNAPSHOT_COLUMNS.items()}
+        self.lock = threading.RLock()
+        self.loaded_at = None
+        self.stale_tables = set()
+        self.versions = {}
+
+    def mark_stale(self, tables):
+        self.stale_tables.update(tables)
+
+    def refresh(self):
+        with self.lock:
+            full = self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age
+            stale, self.stale_tables = self.stale_tables, set()
+            versions = dict(db.session.query(TableVersion.table_name, TableVersion.version))
+            for name, table in self.tables.items():
+                if full or name in stale or versions.get(name) != self.versions.get(name):
+                    table.load()
+                else:
+                    table.refresh()
+            self.versions = versions
+            if full:
+                self.loaded_at = time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            return {name: len(table) for name, table in self.tables.items()}
+
+
+snapshot = ColumnarSnapshot()
+
+
+def available():
+    return np is not None and snapshot.enabled
+
+
+def init_app(app):
+    """Enable the columnar engine (COLUMNAR_ANALYTICS) when NumPy is installed; COLUMNAR_MAX_AGE defaults to the cache TTL"""
+    snapshot.enabled = app.config.get('COLUMNAR_ANALYTICS', True)
+    snapshot.max_age = app.config.get('COLUMNAR_MAX_AGE', app.config.get('ANALYTICS_CACHE_TTL', 30))
+    if snapshot.enabled and np is None:
+        app.logger.warning('NumPy is not installed: cross-project reports use the SQL engine (pip install numpy)')
+
+
+def ensure_table_versions():
+    """Create the table_versions rows of the tracked tables; run by init-db"""
+    existing = {name for (name,) in db.session.query(TableVersion.table_name)}
+    db.session.add_all(TableVersion(table_name=name, version=0) for name in sorted(TRACKED_TABLES - existing))
+    db.session.commit()
+
+
+# ==================== REPORTS ====================
+
+def _project_index(project_ids, foreign_ids):
+    """Position of each foreign key in the sorted project ids, and which of them exist"""
+    positions = np.searchsorted(project_ids, foreign_ids)
+    positions[positions == len(project_ids)] = 0
+    found = project_ids[positions] == foreign_ids if len(project_ids) else np.zeros(len(foreign_ids), dtype=bool)
+    return positions, found
+
+
+def _date_mask(values, start_date, end_date):
+    mask = np.ones(len(values), dtype=bool)
+    if start_date:
+        mask &= values >= np.datetime64(start_date)
+    if end_date:
+        mask &= values <= np.datetime64(end_date)
+    return mask
+
+
+def _sums(positions, size, *weights):
+    return [np.bincount(positions, weights=np.nan_to_num(weight), minlength=size) for weight in weights]
+
+
+def portfolio_report(start_date=None, end_date=None, status=None):
+    """The portfolio report (same rows as aggregations.portfolio_report) from the snapshot"""
+    with snapshot.lock:
+        snapshot.refresh()
+        projects = snapshot.tables['projects']
+        tasks = snapshot.tables['tasks']
+        timesheets = snapshot.tables['timesheets']
+        expenses = snapshot.tables['expenses']
+
+        p = projects.arrays
+        selected = np.ones(len(projects), dtype=bool)
+        if status:
+            selected &= p['status'] == projects.categories['status'].lookup(status)
+        project_ids = p['id']
+        size = len(project_ids)
+
+        t = timesheets.arrays
+        mask = _date_mask(t['work_date'], start_date, end_date)
+        positions, found = _project_index(project_ids, t['project_id'][mask])
+        hours = t['hours'][mask][found]
+        hours_total, billable_total, cost_total = _sums(
+            positions[found], size, hours, np.where(t['billable'][mask][found], hours, 0), t['cost_amount'][mask][found]
+        )
+
+        e = expenses.arrays
+        mask = _date_mask(e['expense_date'], start_date, end_date)
+        positions, found = _project_index(project_ids, e['project_id'][mask])
+        amounts = e['amount'][mask][found]
+        approved = e['status'][mask][found] == expenses.categories['status'].lookup('approved')
+        expense_total, approved_total, billable_expense_total = _sums(
+            positions[found], size, amounts, np.where(approved, amounts, 0), np.where(e['billable'][mask][found], amounts, 0)
+        )
+
+        k = tasks.arrays
+        positions, found = _project_index(project_ids, k['project_id'])
+        positions = positions[found]
+        states = k['state'][found]
+        state_values = tasks.categories['state'].values
+        closed_codes = [tasks.categories['state'].lookup(state) for state in CLOSED_TASK_STATES]
+        # NULL states count as neither open nor closed, as in SQL
+        is_open = ~np.isin(states, closed_codes) & (states != tasks.categories['state'].lookup(None))
+        overdue = is_open & (k['due_date'][found] < np.datetime64(datetime.now().date()))
+        task_total = np.bincount(positions, minlength=size)
+        open_total = np.bincount(positions, weights=is_open, minlength=size)
+        overdue_total = np.bincount(positions, weights=overdue, minlength=size)
+        by_state = np.bincount(positions * len(state_values) + states, minlength=size * len(state_values))
+        by_state = by_state.reshape(size, len(state_values)) if state_values else np.zeros((size, 0), dtype=np.int64)
+
+        rows = []
+        for i in np.flatnonzero(selected):
+            rows.append(portfolio_row(
+                (int(project_ids[i]), p['project_code'][i], p['name'][i],
+                 projects.categories['status'].values[p['status'][i]], p['budget_amount'][i]),
+                (float(hours_total[i]), float(billable_total[i]), float(cost_total[i])),
+                (float(expense_total[i]), float(approved_total[i]), float(billable_expense_total[i])),
+                (int(task_total[i]), int(open_total[i]), int(overdue_total[i]),
+                 {state_values[code]: int(count) for code, count in enumerate(by_state[i]) if count})
+            ))
+    return rows, portfolio_totals(rows)
+
+
+# ==================== WRITE TRACKING ====================
+# Deletes, and edits to rows without updated_at, cannot be found by id or
+# updated_at; tables touched that way are reloaded in full on the next refresh
+# after the commit. The writing transaction also bumps their table_versions
+# counter once, so other processes reload them too.
+
+TRACKED_TABLES = {'projects', 'tasks', 'timesheets', 'expenses'}
+
+
+def _bump_versions(session, tables):
+    bumped = session.info.setdefault('columnar_bumped_tables', set())
+    tables = tables - bumped
+    if tables:
+        versions = TableVersion.__table__
+        session.connection().execute(
+            versions.update().where(versions.c.table_name.in_(tables)).values(version=versions.c.version + 1)
+        )
+        bumped.update(tables)
+        session.info.setdefault('columnar_stale_tables', set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_rewritten_tables(session, flush_context):
+    tables = {
+        obj.__tablename__ for obj in session.deleted
+        if getattr(obj, '__tablename__', None) in TRACKED_TABLES
+    }
+    tables.update(
+        obj.__tablename__ for obj in session.dirty
+        if getattr(obj, '__tablename__', None) in TRACKED_TABLES and not hasattr(obj, 'updated_at')
+    )
+    if tables:
+        _bump_versions(session, tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_rewrites(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name in TRACKED_TABLES:
+            _bump_versions(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, 'after_commit')
+def _mark_stale_on_commit(session):
+    session.info.pop('columnar_bumped_tables', None)
+    tables = session.info.pop('columnar_stale_tables', None)
+    if tables:
+        snapshot.mark_stale(tables)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_on_rollback(session, previous_transaction):
+    # A rolled back savepoint may have held a bump; bumping again is harmless
+    session.info.pop('columnar_bumped_tables', None)
+    if not session.in_transaction():
+        session.info.pop('columnar_stale_tables', None)
@@ -0,0 +1,99 @@
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db
+from sqlalchemy import inspect
+import click
+import rollups
+import migrations
+import document_totals
+import index_advisor
+import columnar
+
+
+# ==================== SCHEMA SETUP ====================
+
+def init_db():
+    """Create missing tables, columns and indexes; safe to run against an existing database"""
+    existing_tables = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    if not set(rollups.ROLLUP_TABLES) <= existing_tables:
+        # A rollup table was just created: fill all of them from timesheets and expenses
+        rollups.rebuild_project_financials()
+    columnar.ensure_table_versions()
+    added_columns = migrations.add_missing_columns()
+    if any(column in ('amount_total', 'lines_count') for _, column in added_columns):
+        # Stored document totals start at zero on existing rows
+        document_totals.backfill_document_totals()
+    created_indexes, failed_indexes = migrations.ensure_indexes()
+    if failed_indexes:
+        current_app.logger.warning('Could not create unique index(es) %s: duplicate rows exist', ', '.join(failed_indexes))
+    return added_columns, created_indexes, failed_indexes
+
+
+# ==================== CLI COMMANDS ====================
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create or upgrade the database schema (tables, added columns and indexes)"""
+    added_columns, created_indexes, failed_indexes = init_db()
+    for table, column in added_columns:
+        click.echo('added column %s.%s' % (table, column))
+    for name in created_indexes:
+        click.echo('created index %s' % name)
+    for name in failed_indexes:
+        click.echo('could not create unique index %s: duplicate rows exist' % name)
+    click.echo('Database schema is up to date')
+
+
+@click.command('rebuild-financials')
+@click.option('--check', is_flag=True, help='Only report drift, do not rewrite the rollup')
+@with_appcontext
+def rebuild_financials_command(check):
+    """Recompute the project_financials and timesheet_daily rollups from timesheets and expenses"""
+    drift = rollups.rebuild_project_financials(check_only=check)
+    for project_id, column, stored, expected in drift:
+        click.echo('project %s %s: stored=%s expected=%s' % (project_id, column, stored, expected))
+    click.echo('%d drifted value(s)%s' % (len(drift), '' if check else ', rollup rebuilt'))
+
+
+@click.command('backfill-document-totals')
+@click.option('--check', is_flag=True, help='Only report mismatches, do not rewrite the totals')
+@with_appcontext
+def backfill_document_totals_command(check):
+    """Recompute stored order/invoice/bill totals from their lines"""
+    drift = document_totals.backfill_document_totals(check_only=check)
+    for table, document_id, stored, expected in drift:
+        click.echo('%s %s: stored=%s expected=%s' % (table, document_id, stored, expected))
+    click.echo('%d mismatched document(s)%s' % (len(drift), '' if check else ', totals backfilled'))
+
+
+@click.command('index-advisor')
+@click.argument('capture_file')
+@click.option('--statements', is_flag=True, help='Print the statement behind each scan')
+@with_appcontext
+def index_advisor_command(capture_file, statements):
+    """Replay queries captured via QUERY_CAPTURE_PATH through EXPLAIN QUERY PLAN and report scans"""
+    entries = index_advisor.load_captured(capture_file)
+    findings = index_advisor.find_scans(entries)
+    for finding in findings:
+        click.echo('%-10s %-30s %s' % (finding['kind'], finding['table'] or '-', finding['detail']))
+        if statements:
+            click.echo('    ' + ' '.join(finding['statement'].split()))
+    kinds = [finding['kind'] for finding in findings]
+    click.echo('%d statement(s) checked, %d full scan(s), %d index scan(s), %d error(s)' % (
+        len(entries), kinds.count('full scan'), kinds.count('index scan'), kinds.count('error')
+    ))
+
+
+CLI_COMMANDS = [
+    init_db_command,
+    rebuild_financials_command,
+    backfill_document_totals_command,
+    index_advisor_command
+]
+
+
+def init_app(app):
+    for command in CLI_COMMANDS:
+        app.cli.add_command(command)
@@ -0,0 +1,99 @@
+from flask import current_app, make_response, request, session
+from models import db
+from sqlalchemy import func, select
+from datetime import datetime
+from functools import wraps
+import hashlib
+
+
+# ==================== VALIDATORS ====================
+# A validator takes the view's URL arguments and returns a tuple of cheap
+# aggregates (timestamps, counts) that changes whenever the response body
+# would, or None when the resource does not exist. It never builds the body.
+# Bodies that embed columns of other tables (partner names, user emails) cover
+# those tables too, so renaming a partner changes the tag of its documents.
+
+def related_state(model, resource_id, *paths):
+    """Scalar subqueries for the count and newest updated_at of the rows each path reaches from one row
+
+    A path is a relationship attribute or a tuple of them, e.g.
+    SalesOrder.customer or (SalesOrder.lines, SalesOrderLine.product).
+    """
+    columns = []
+    for path in paths:
+        path = path if isinstance(path, tuple) else (path,)
+        target = path[-1].property.mapper.class_
+        for aggregate in (func.count(target.id), func.max(target.updated_at)):
+            query = select(aggregate).select_from(model)
+            for relationship in path:
+                query = query.join(relationship)
+            columns.append(query.where(model.id == resource_id).correlate(None).scalar_subquery())
+    return columns
+
+
+def collection_validator(model, *related):
+    """Row count and newest updated_at of a whole table, and of each `related` table the rows embed"""
+    def validator(**view_args):
+        columns = [func.count(model.id), func.max(model.updated_at)]
+        for other in related:
+            columns.append(select(func.count(other.id)).scalar_subquery())
+            columns.append(select(func.max(other.updated_at)).scalar_subquery())
+        return tuple(db.session.query(*columns).select_from(model).one())
+    return validator
+
+
+def resource_validator(model, *related):
+    """updated_at of the single row named by the view's only URL argument, plus related_state of `related` paths"""
+    def validator(**view_args):
+        (resource_id,) = view_args.values()
+        row = db.session.query(
+            model.updated_at, *related_state(model, resource_id, *related)
+        ).filter(model.id == resource_id).first()
+        return None if row is None else tuple(row)
+    return validator
+
+
+def _etag(state):
+    # The path and query string are part of the tag: pages, filters and fields= differ in body
+    raw = repr((request.path, sorted(request.args.items(multi=True)), state))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# ==================== CONDITIONAL GET ====================
+
+def conditional(validator):
+    """Give a GET view a weak ETag and Last-Modified, answering a matching If-None-Match with 304
+
+    The validator runs before the view; on a match the view is skipped
+    entirely. Last-Modified is the newest timestamp in the validator state and
+    is informational only: deleting a child row does not move it, so clients
+    should revalidate with If-None-Match. Unauthenticated requests and
+    missing resources fall through to the view unchanged.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if 'user_id' not in session:
+                return view(*args, **kwargs)
+            state = validator(**kwargs)
+            if state is None:
+                return view(*args, **kwargs)
+
+            etag = _etag(state)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            timestamps = [value for value in state if isinstance(value, datetime)]
+            if timestamps:
+                response.last_modified = max(timestamps)
+            # Authenticated data: clients may keep it but must revalidate before reuse
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
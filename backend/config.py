@@ -0,0 +1,94 @@
+import os
+
+
+# ==================== ENVIRONMENT HELPERS ====================
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def engine_options(url):
+    """Pool settings for an engine URL; in-memory SQLite uses a single shared connection and takes none"""
+    if url.startswith('sqlite') and (':memory:' in url or url.rstrip('/') == 'sqlite:'):
+        return {}
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)
+    }
+
+
+# ==================== CONFIGURATION ====================
+
+class Config:
+    """App settings read from the environment (see .env.example); defaults suit local development"""
+
+    SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(24)
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///project_management.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLALCHEMY_ENGINE_OPTIONS and SQLALCHEMY_BINDS are derived from the final URLs in create_app
+
+    # Optional read replica; read-only requests are routed to it (see db_routing.py)
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+
+    SQLITE_TUNED = _env_bool('SQLITE_TUNED', True)
+
+    # The analytics cache is per process: a commit drops the entries it affects in the committing
+    # process only, so other workers may serve data up to ANALYTICS_CACHE_TTL seconds old
+    ANALYTICS_CACHE_ENABLED = _env_bool('ANALYTICS_CACHE_ENABLED', True)
+    ANALYTICS_CACHE_MAX_ENTRIES = _env_int('ANALYTICS_CACHE_MAX_ENTRIES', 512)
+    ANALYTICS_CACHE_TTL = _env_int('ANALYTICS_CACHE_TTL', 30)
+    # Concurrent identical analytics requests share one computation; across worker processes
+    # through lock and result files in ANALYTICS_SINGLE_FLIGHT_DIR (default: instance/single_flight)
+    ANALYTICS_SINGLE_FLIGHT = _env_bool('ANALYTICS_SINGLE_FLIGHT', True)
+    ANALYTICS_SINGLE_FLIGHT_DIR = os.environ.get('ANALYTICS_SINGLE_FLIGHT_DIR')
+    ANALYTICS_SINGLE_FLIGHT_TIMEOUT = _env_int('ANALYTICS_SINGLE_FLIGHT_TIMEOUT', 30)
+
+    # Serve cross-project reports from in-memory NumPy columns (when NumPy is installed),
+    # fully reloaded every COLUMNAR_MAX_AGE seconds (default: the cache TTL) and refreshed incrementally in between
+    COLUMNAR_ANALYTICS = _env_bool('COLUMNAR_ANALYTICS', True)
+    COLUMNAR_MAX_AGE = _env_int('COLUMNAR_MAX_AGE', ANALYTICS_CACHE_TTL)
+
+    # Background analytics jobs (POST /analytics/jobs): threads per process, seconds a
+    # result is kept, and seconds after which an unfinished job counts as lost
+    ANALYTICS_JOB_WORKERS = _env_int('ANALYTICS_JOB_WORKERS', 2)
+    ANALYTICS_JOB_TTL = _env_int('ANALYTICS_JOB_TTL', 3600)
+    ANALYTICS_JOB_TIMEOUT = _env_int('ANALYTICS_JOB_TIMEOUT', 900)
+
+    # Werkzeug hash method for new passwords; logins rehash passwords stored with other parameters
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # Processes that run the hashing (0 = in the request thread) and the per-process limit on queued hashes
+    PASSWORD_HASH_WORKERS = _env_int('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING = _env_int('PASSWORD_HASH_MAX_PENDING', 32)
+
+    # orjson encodes JSON responses when installed; off falls back to the stdlib encoder
+    FAST_JSON = _env_bool('FAST_JSON', True)
+
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED', True)
+    if 'REQUEST_STATS_HEADERS' in os.environ:
+        REQUEST_STATS_HEADERS = _env_bool('REQUEST_STATS_HEADERS', False)
+    QUERY_CAPTURE_PATH = os.environ.get('QUERY_CAPTURE_PATH')
+
+
+def apply_database_options(settings):
+    """Fill in pool options and the replica bind for the configured URLs, unless already set
+
+    Runs on the final app config, so a SQLALCHEMY_DATABASE_URI or
+    DATABASE_REPLICA_URL passed to create_app gets options that match it.
+    """
+    settings.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(settings['SQLALCHEMY_DATABASE_URI']))
+    replica_url = settings.get('DATABASE_REPLICA_URL')
+    settings.setdefault('SQLALCHEMY_BINDS', {
+        'replica': dict(url=replica_url, **engine_options(replica_url))
+    } if replica_url else {})
@@ -0,0 +1,40 @@
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+# Engine bind key that read-only requests are sent to when it is configured
+REPLICA_BIND_KEY = 'replica'
+
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """Session that sends read-only requests to the replica bind, everything else to the primary
+
+    Routing is decided per request method: GET/HEAD/OPTIONS requests, and views
+    marked with @read_only, read from the replica (if one is configured); other
+    requests, flushes and work outside a request (CLI commands, startup) always
+    use the primary. Replica reads may
+    lag behind the primary by the replication delay.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and request_is_read_only():
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """Mark a view that reads but takes a body (e.g. a POST query) as read-only for routing and locking"""
+    view.read_only = True
+    return view
+
+
+def request_is_read_only():
+    if not has_request_context():
+        return False
+    if request.method in READ_ONLY_METHODS:
+        return True
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'read_only', False)
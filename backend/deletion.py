@@ -0,0 +1,95 @@
+from models import (
+    db, User, Project, ProjectMember, Task, TaskAssignment, TaskComment, TaskAttachment,
+    Timesheet, Expense, ProjectFinancial, ProjectExpenseStatusTotal
+)
+from sales_purchase_models import SalesOrder, CustomerInvoice, PurchaseOrder, VendorBill
+from sqlalchemy import delete, func, select, update
+import rollups
+
+
+class DeleteRestricted(Exception):
+    """Rows referencing the target through an ON DELETE RESTRICT foreign key block the delete"""
+    
+    def __init__(self, references):
+        super().__init__('Still referenced by %s' % ', '.join(
+            '%d %s' % (count, table) for table, count in references.items()
+        ))
+        self.references = references
+
+
+# ==================== SET-BASED DELETE HELPERS ====================
+# Children are removed with one DELETE/UPDATE per table instead of loading them
+# through the ORM cascade. Statements run children-first, so they also work
+# with foreign key enforcement on. Nothing is committed here.
+
+def _check_restricted(checks):
+    references = {}
+    for model, criterion in checks:
+        count = db.session.query(func.count(model.id)).filter(criterion).scalar()
+        if count:
+            references[model.__tablename__] = count
+    if references:
+        raise DeleteRestricted(references)
+
+
+def _run(counts, statement):
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+    counts[statement.table.name] = counts.get(statement.table.name, 0) + result.rowcount
+
+
+def delete_project(project_id):
+    """Delete a project with its members, tasks and everything hanging off the tasks
+    
+    Timesheets and expenses reference projects with ON DELETE RESTRICT; if any
+    exist, DeleteRestricted is raised and nothing is deleted. Sales and
+    purchase documents keep their optional project link cleared, as the ORM
+    backref did. Returns ({table: rows deleted}, {table: rows set to NULL}).
+    """
+    _check_restricted([
+        (Timesheet, Timesheet.project_id == project_id),
+        (Expense, Expense.project_id == project_id)
+    ])
+    
+    task_ids = select(Task.id).where(Task.project_id == project_id)
+    deleted = {}
+    nulled = {}
+    
+    # Timesheets of this project's tasks booked against another project leave that project's rollup
+    rollups.remove_timesheets(db.session.connection(), Timesheet.task_id.in_(task_ids))
+    _run(deleted, delete(Timesheet).where(Timesheet.task_id.in_(task_ids)))
+    _run(nulled, update(Expense).where(Expense.task_id.in_(task_ids)).values(task_id=None))
+    for model in (TaskAssignment, TaskComment, TaskAttachment):
+        _run(deleted, delete(model).where(model.task_id.in_(task_ids)))
+    _run(deleted, delete(Task).where(Task.project_id == project_id))
+    _run(deleted, delete(ProjectMember).where(ProjectMember.project_id == project_id))
+    for model in (SalesOrder, CustomerInvoice, PurchaseOrder, VendorBill):
+        _run(nulled, update(model).where(model.project_id == project_id).values(project_id=None))
+    _run(deleted, delete(ProjectFinancial).where(ProjectFinancial.project_id == project_id))
+    _run(deleted, delete(ProjectExpenseStatusTotal).where(ProjectExpenseStatusTotal.project_id == project_id))
+    _run(deleted, delete(Project).where(Project.id == project_id))
+    return deleted, nulled
+
+
+def delete_user(user_id):
+    """Delete a user, their memberships and assignments, and clear their optional references
+    
+    Tasks they created, their timesheets and submitted expenses reference users
+    with ON DELETE RESTRICT and raise DeleteRestricted. Returns
+    ({table: rows deleted}, {table: rows set to NULL}).
+    """
+    _check_restricted([
+        (Task, Task.created_by == user_id),
+        (Timesheet, Timesheet.user_id == user_id),
+        (Expense, Expense.submitted_by == user_id)
+    ])
+    
+    deleted = {}
+    nulled = {}
+    _run(deleted, delete(ProjectMember).where(ProjectMember.user_id == user_id))
+    _run(deleted, delete(TaskAssignment).where(TaskAssignment.user_id == user_id))
+    _run(nulled, update(Project).where(Project.project_manager_id == user_id).values(project_manager_id=None))
+    _run(nulled, update(TaskComment).where(TaskComment.user_id == user_id).values(user_id=None))
+    _run(nulled, update(TaskAttachment).where(TaskAttachment.uploaded_by == user_id).values(uploaded_by=None))
+    _run(nulled, update(Expense).where(Expense.approved_by == user_id).values(approved_by=None))
+    _run(deleted, delete(User).where(User.id == user_id))
+    return deleted, nulled
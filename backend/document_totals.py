@@ -0,0 +1,61 @@
+from models import db
+from sales_purchase_models import SalesOrder, CustomerInvoice, PurchaseOrder, VendorBill
+from sqlalchemy import func, select, update
+
+# Documents carrying stored amount_total/lines_count (see DocumentTotalsMixin)
+DOCUMENT_MODELS = [SalesOrder, CustomerInvoice, PurchaseOrder, VendorBill]
+
+
+def _line_columns(model):
+    lines = model.lines.property
+    line_model = lines.mapper.class_
+    return line_model, next(iter(lines.remote_side))
+
+
+def _differs(a, b):
+    return abs((a or 0) - (b or 0)) > 1e-6
+
+
+def find_document_totals_drift():
+    """Compare stored document totals with their lines; returns (table, id, stored, expected) tuples"""
+    drift = []
+
+    for model in DOCUMENT_MODELS:
+        line_model, parent_column = _line_columns(model)
+        expected = {
+            document_id: (float(amount_total or 0), lines_count)
+            for document_id, amount_total, lines_count in db.session.query(
+                parent_column,
+                func.sum(line_model.line_total),
+                func.count(line_model.id)
+            ).group_by(parent_column)
+        }
+
+        for document_id, amount_total, lines_count in db.session.query(model.id, model.amount_total, model.lines_count):
+            expected_total, expected_count = expected.get(document_id, (0.0, 0))
+            if _differs(amount_total, expected_total) or lines_count != expected_count:
+                drift.append((model.__tablename__, document_id, (amount_total, lines_count), (expected_total, expected_count)))
+
+    return drift
+
+
+def backfill_document_totals(check_only=False):
+    """Recompute stored totals for every document; returns the drift found before backfilling"""
+    drift = find_document_totals_drift()
+
+    if not check_only:
+        for model in DOCUMENT_MODELS:
+            line_model, parent_column = _line_columns(model)
+            db.session.execute(
+                update(model).values(
+                    amount_total=select(func.coalesce(func.sum(line_model.line_total), 0))
+                    .where(parent_column == model.id).scalar_subquery(),
+                    lines_count=select(func.count(line_model.id))
+                    .where(parent_column == model.id).scalar_subquery(),
+                    # A backfill is not an edit; keep the documents' modification time
+                    updated_at=model.updated_at
+                ).execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+    return drift
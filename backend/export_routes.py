@@ -0,0 +1,146 @@
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+from models import db, Timesheet, Expense
+from datetime import datetime, date
+import csv
+import io
+import json
+
+export_bp = Blueprint('exports', __name__)
+
+# Rows fetched from the database cursor and written to the response per batch
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+TIMESHEET_EXPORT_COLUMNS = [
+    Timesheet.id, Timesheet.project_id, Timesheet.task_id, Timesheet.user_id, Timesheet.work_date,
+    Timesheet.hours, Timesheet.billable, Timesheet.internal_cost_rate, Timesheet.cost_amount,
+    Timesheet.status, Timesheet.linked_invoice_line_id, Timesheet.notes
+]
+
+EXPENSE_EXPORT_COLUMNS = [
+    Expense.id, Expense.project_id, Expense.task_id, Expense.submitted_by, Expense.approved_by,
+    Expense.expense_date, Expense.description, Expense.amount, Expense.billable, Expense.status,
+    Expense.receipt_url, Expense.linked_invoice_line_id
+]
+
+
+# Helper function to check authentication
+def require_auth():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    return None
+
+
+# ==================== EXPORT HELPERS ====================
+
+def _export_filters(model, date_column, user_column):
+    """Build filter criteria from start_date, end_date, project_id and user_id query args
+    
+    Raises ValueError for malformed values so the caller can answer 400 before
+    the response starts streaming.
+    """
+    criteria = []
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    project_id = request.args.get('project_id')
+    user_id = request.args.get('user_id')
+    
+    if start_date:
+        criteria.append(date_column >= datetime.strptime(start_date, '%Y-%m-%d').date())
+    if end_date:
+        criteria.append(date_column <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    if project_id:
+        criteria.append(model.project_id == int(project_id))
+    if user_id:
+        criteria.append(user_column == int(user_id))
+    return criteria
+
+
+def _to_text(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_batches(names, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(names, map(_to_text, row))), separators=(',', ':')))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_batches(names, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    count = 0
+    for row in rows:
+        writer.writerow(map(_to_text, row))
+        count += 1
+        if count >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
+
+
+def _stream_export(name, model, columns, date_column, user_column):
+    """Stream the filtered rows of `columns` as NDJSON or CSV
+    
+    Rows are read with yield_per, so only one batch is held in memory at a time
+    whatever the size of the export.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    try:
+        criteria = _export_filters(model, date_column, user_column)
+    except ValueError:
+        return jsonify({'error': 'Invalid filter value'}), 400
+    
+    query = db.session.query(*columns).filter(*criteria).order_by(columns[0]).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+    names = [column.key for column in columns]
+    batches = _csv_batches if export_format == 'csv' else _ndjson_batches
+    
+    def generate():
+        yield from batches(names, query)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': 'attachment; filename=%s.%s' % (name, export_format)}
+    )
+
+
+# ==================== EXPORT ROUTES ====================
+
+@export_bp.route('/exports/timesheets', methods=['GET'])
+def export_timesheets():
+    """Stream timesheets as NDJSON or CSV, filtered by date range, project and user"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    return _stream_export('timesheets', Timesheet, TIMESHEET_EXPORT_COLUMNS, Timesheet.work_date, Timesheet.user_id)
+
+
+@export_bp.route('/exports/expenses', methods=['GET'])
+def export_expenses():
+    """Stream expenses as NDJSON or CSV, filtered by date range, project and submitter"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    return _stream_export('expenses', Expense, EXPENSE_EXPORT_COLUMNS, Expense.expense_date, Expense.submitted_by)
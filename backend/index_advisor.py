@@ -0,0 +1,87 @@
+from models import db
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+import json
+import re
+import threading
+
+# Plan details such as "SCAN timesheets" (no index used at all). A
+# "SCAN t USING [COVERING] INDEX ..." walks a whole index instead and is
+# reported separately as an index scan.
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+INDEX_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX (\w+)')
+
+
+# ==================== QUERY CAPTURE ====================
+
+class QueryCapture:
+    """Append each distinct SELECT statement run by the app to an NDJSON file for later EXPLAIN"""
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith('SELECT'):
+            return
+        with self._lock:
+            if statement in self._seen:
+                return
+            self._seen.add(statement)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'statement': statement, 'parameters': list(parameters or ())}, default=str) + '\n')
+
+
+def init_app(app):
+    """Capture statements to QUERY_CAPTURE_PATH when that setting is present"""
+    path = app.config.get('QUERY_CAPTURE_PATH')
+    if not path:
+        return
+    capture = QueryCapture(path)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', capture.record)
+
+
+def load_captured(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ==================== EXPLAIN ====================
+
+def explain(connection, statement, parameters):
+    """Return the EXPLAIN QUERY PLAN detail lines for one statement"""
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, tuple(parameters)).all()
+    return [row[-1] for row in rows]
+
+
+def find_scans(entries):
+    """Replay captured statements through EXPLAIN QUERY PLAN and list full table and index scans
+
+    Returns a list of {'table', 'kind', 'index', 'detail', 'statement'} dicts, one
+    per scan step; statements SQLite refuses to plan come back with kind 'error'.
+    Only SQLite is supported.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError('The index advisor only understands SQLite query plans')
+
+    findings = []
+    with db.engine.connect() as connection:
+        for entry in entries:
+            try:
+                details = explain(connection, entry['statement'], entry['parameters'])
+            except DBAPIError as e:
+                findings.append({'table': None, 'kind': 'error', 'index': None,
+                                 'detail': str(e.orig), 'statement': entry['statement']})
+                continue
+            for detail in details:
+                full = FULL_SCAN.match(detail)
+                partial = INDEX_SCAN.match(detail)
+                if full:
+                    findings.append({'table': full.group(1), 'kind': 'full scan', 'index': None,
+                                     'detail': detail, 'statement': entry['statement']})
+                elif partial:
+                    findings.append({'table': partial.group(1), 'kind': 'index scan', 'index': partial.group(2),
+                                     'detail': detail, 'statement': entry['statement']})
+    return findings
@@ -0,0 +1,205 @@
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import threading
+import time
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ==================== SQL QUERY COUNTING ====================
+# Cursor events are attached to every Engine so the counters work regardless of
+# which engine Flask-SQLAlchemy creates. Figures are kept on flask.g per request.
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _record_query(conn):
+    if conn is None or not has_request_context():
+        return
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    g.query_count = g.get('query_count', 0) + 1
+    g.query_time = g.get('query_time', 0.0) + elapsed
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(conn)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # A failed statement skips after_cursor_execute; pop its start time here so it is not
+    # left behind to be matched against the next statement on this connection
+    _record_query(exception_context.connection)
+
+
+def get_request_stats():
+    """Return the query count and timings collected so far for the current request"""
+    started = g.get('request_start_time')
+    return {
+        'query_count': g.get('query_count', 0),
+        'query_time_ms': round(g.get('query_time', 0.0) * 1000, 3),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3) if started else None
+    }
+
+
+# ==================== METRICS REGISTRY ====================
+
+class RequestMetrics:
+    """Per-endpoint request latency histograms and SQL/response counters
+
+    Figures are per process; with several workers each one reports its own.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._requests = {}
+        self._statements = {}
+        self._db_time = {}
+        self._response_bytes = {}
+
+    def observe(self, endpoint, method, status, duration, statements, db_time):
+        with self._lock:
+            counts, total = self._latency.get((endpoint, method), ([0] * (len(self.buckets) + 1), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._latency[(endpoint, method)] = (counts, total + duration)
+
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._statements[endpoint] = self._statements.get(endpoint, 0) + statements
+            self._db_time[endpoint] = self._db_time.get(endpoint, 0.0) + db_time
+
+    def add_response_bytes(self, endpoint, size):
+        with self._lock:
+            self._response_bytes[endpoint] = self._response_bytes.get(endpoint, 0) + size
+
+    def reset(self):
+        with self._lock:
+            for series in (self._latency, self._requests, self._statements, self._db_time, self._response_bytes):
+                series.clear()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            lines = [
+                '# HELP http_request_duration_seconds Request latency by endpoint',
+                '# TYPE http_request_duration_seconds histogram'
+            ]
+            for (endpoint, method), (counts, total) in sorted(self._latency.items()):
+                labels = 'endpoint="%s",method="%s"' % (_escape(endpoint), method)
+                for bound, count in zip(self.buckets, counts):
+                    lines.append('http_request_duration_seconds_bucket{%s,le="%s"} %d' % (labels, bound, count))
+                lines.append('http_request_duration_seconds_bucket{%s,le="+Inf"} %d' % (labels, counts[-1]))
+                lines.append('http_request_duration_seconds_sum{%s} %.6f' % (labels, total))
+                lines.append('http_request_duration_seconds_count{%s} %d' % (labels, counts[-1]))
+
+            lines += ['# HELP http_requests_total Requests by endpoint and status', '# TYPE http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append('http_requests_total{endpoint="%s",method="%s",status="%s"} %d' % (_escape(endpoint), method, status, count))
+
+            lines += ['# HELP db_statements_total SQL statements executed by endpoint', '# TYPE db_statements_total counter']
+            for endpoint, count in sorted(self._statements.items()):
+                lines.append('db_statements_total{endpoint="%s"} %d' % (_escape(endpoint), count))
+
+            lines += ['# HELP db_time_seconds_total Time spent in SQL statements by endpoint', '# TYPE db_time_seconds_total counter']
+            for endpoint, total in sorted(self._db_time.items()):
+                lines.append('db_time_seconds_total{endpoint="%s"} %.6f' % (_escape(endpoint), total))
+
+            lines += ['# HELP http_response_bytes_total Response body bytes by endpoint', '# TYPE http_response_bytes_total counter']
+            for endpoint, size in sorted(self._response_bytes.items()):
+                lines.append('http_response_bytes_total{endpoint="%s"} %d' % (_escape(endpoint), size))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = RequestMetrics()
+
+
+def _endpoint_label():
+    return request.endpoint or 'unmatched'
+
+
+def _count_streamed_bytes(iterable, endpoint):
+    """Pass a streamed body through, adding its size to the metrics once it is sent"""
+    size = 0
+    try:
+        for chunk in iterable:
+            size += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        metrics.add_response_bytes(endpoint, size)
+
+
+def metrics_view():
+    """Expose the collected request metrics in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    """Collect per-request metrics, serve them at /metrics and optionally report them as headers
+
+    The X-Query-Count / Server-Timing headers are only added in debug mode or
+    when REQUEST_STATS_HEADERS is set.
+    """
+
+    @app.before_request
+    def _start_request_stats():
+        g.request_start_time = time.perf_counter()
+        g.query_count = 0
+        g.query_time = 0.0
+
+    @app.after_request
+    def _record_response(response):
+        endpoint = _endpoint_label()
+        if response.is_streamed:
+            response.response = _count_streamed_bytes(response.response, endpoint)
+        else:
+            metrics.add_response_bytes(endpoint, response.calculate_content_length() or 0)
+        g.response_status = response.status_code
+
+        if app.config.get('REQUEST_STATS_HEADERS', app.debug):
+            stats = get_request_stats()
+            response.headers['X-Query-Count'] = str(stats['query_count'])
+            response.headers['X-Query-Time-Ms'] = str(stats['query_time_ms'])
+            response.headers['X-Response-Time-Ms'] = str(stats['elapsed_ms'])
+            response.headers['Server-Timing'] = 'db;dur=%s;desc="%d queries", app;dur=%s' % (
+                stats['query_time_ms'], stats['query_count'], stats['elapsed_ms']
+            )
+        return response
+
+    @app.teardown_request
+    def _observe_request(exc):
+        # Runs after streamed bodies finish, so their queries and duration are included
+        started = g.get('request_start_time')
+        if started is None:
+            return
+        metrics.observe(
+            _endpoint_label(),
+            request.method,
+            g.get('response_status', 500),
+            time.perf_counter() - started,
+            g.get('query_count', 0),
+            g.get('query_time', 0.0)
+        )
+
+    if app.config.get('METRICS_ENABLED', True):
+        app.add_url_rule('/metrics', 'metrics', metrics_view)
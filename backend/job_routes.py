@@ -0,0 +1,95 @@
+from flask import Blueprint, Response, current_app, request, jsonify, session
+from models import db, AnalyticsJob
+from datetime import datetime
+from report_jobs import runner, resolve, job_to_dict, JobRejected
+
+job_bp = Blueprint('jobs', __name__)
+
+
+# Helper function to check authentication
+def require_auth():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    return None
+
+
+def get_live_job(job_id):
+    """The job, or None when it does not exist or has expired"""
+    job = db.session.get(AnalyticsJob, job_id)
+    if job is None or job.expires_at <= datetime.utcnow():
+        return None
+    return job
+
+
+# ==================== ANALYTICS JOBS ====================
+
+@job_bp.route('/analytics/jobs', methods=['POST'])
+def create_job():
+    """Run an analytics GET endpoint in the background
+    
+    Body: {"path": "/analytics/timesheets/overview", "params": {...}}. An
+    identical request that is still queued or running is returned instead of
+    starting another job; a finished one is not reused.
+    """
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        path, params, request_key = resolve(current_app, data.get('path'), data.get('params', {}))
+    except JobRejected as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        job = runner.find(request_key)
+        if job is not None:
+            db.session.rollback()
+            return jsonify({'job': job_to_dict(job), 'coalesced': True}), 200
+        
+        job = runner.submit(current_app._get_current_object(), path, params, request_key, session['user_id'])
+        response = jsonify({'job': job_to_dict(job), 'coalesced': False})
+        response.status_code = 202
+        response.headers['Location'] = '/analytics/jobs/%s' % job.id
+        return response
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@job_bp.route('/analytics/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status of an analytics job"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    job = get_live_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    return jsonify(job_to_dict(job)), 200
+
+
+@job_bp.route('/analytics/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Get the response the job's endpoint produced; 202 with the job while it is still running"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    job = get_live_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    job_data = job_to_dict(job)
+    if job_data['status'] in ('queued', 'running'):
+        response = jsonify({'job': job_data})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
+    if job.result is None:
+        return jsonify({'error': job_data['error'] or 'Job failed', 'job': job_data}), 500
+    
+    # The endpoint's own response, including error responses (e.g. 400 for bad parameters)
+    return Response(job.result, status=job.status_code, mimetype=job.mimetype, headers={'X-Job-Id': job.id})
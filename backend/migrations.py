@@ -0,0 +1,60 @@
+from models import db
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+
+# ==================== COLUMN MIGRATIONS ====================
+# db.create_all() only creates missing tables. Columns added to a model later
+# are brought into existing databases here with ALTER TABLE ... ADD COLUMN,
+# which requires them to be nullable or to carry a server default.
+
+def add_missing_columns():
+    """Add model columns missing from existing tables; returns [(table, column)] added"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text('ALTER TABLE %s ADD COLUMN %s' % (table.name, ddl)))
+                added.append((table.name, column.name))
+
+    return added
+
+
+# ==================== INDEX MIGRATIONS ====================
+
+def ensure_indexes():
+    """Create indexes declared on the models but missing from existing tables
+
+    Returns (created, failed) lists of index names. A unique index fails when
+    the table already holds duplicate rows; those are reported, not fixed.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    failed = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                with db.engine.begin() as connection:
+                    index.create(connection)
+                created.append(index.name)
+            except IntegrityError:
+                failed.append(index.name)
+
+    return created, failed
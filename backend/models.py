@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -11,6 +12,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     managed_projects = db.relationship('Project', back_populates='project_manager', foreign_keys='Project.project_manager_id')
@@ -26,6 +28,9 @@ class User(db.Model):
 
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        db.Index('idx_projects_manager', 'project_manager_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_code = db.Column(db.String(50), unique=True, nullable=False)
@@ -49,6 +54,10 @@ class Project(db.Model):
 
 class ProjectMember(db.Model):
     __tablename__ = 'project_members'
+    __table_args__ = (
+        db.Index('uq_project_user', 'project_id', 'user_id', unique=True),
+        db.Index('idx_project_members_user', 'user_id')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
@@ -63,6 +72,11 @@ class ProjectMember(db.Model):
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('idx_tasks_project_state', 'project_id', 'state'),
+        db.Index('idx_tasks_due', 'due_date'),
+        db.Index('idx_tasks_created_by', 'created_by')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
@@ -87,6 +101,10 @@ class Task(db.Model):
 
 class TaskAssignment(db.Model):
     __tablename__ = 'task_assignments'
+    __table_args__ = (
+        db.Index('uq_task_user', 'task_id', 'user_id', unique=True),
+        db.Index('idx_task_assign_user', 'user_id')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), nullable=False)
@@ -100,6 +118,9 @@ class TaskAssignment(db.Model):
 
 class TaskComment(db.Model):
     __tablename__ = 'task_comments'
+    __table_args__ = (
+        db.Index('idx_task_comments_task', 'task_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), nullable=False)
@@ -114,6 +135,10 @@ class TaskComment(db.Model):
 
 class TaskAttachment(db.Model):
     __tablename__ = 'task_attachments'
+    __table_args__ = (
+        db.Index('idx_task_attachments_task', 'task_id'),
+        db.Index('idx_task_attachments_uploaded_by', 'uploaded_by')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), nullable=False)
@@ -129,6 +154,12 @@ class TaskAttachment(db.Model):
 
 class Timesheet(db.Model):
     __tablename__ = 'timesheets'
+    __table_args__ = (
+        db.Index('idx_ts_project', 'project_id', 'work_date'),
+        db.Index('idx_ts_user_date', 'user_id', 'work_date'),
+        db.Index('idx_ts_task', 'task_id'),
+        db.Index('idx_ts_work_date', 'work_date')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='RESTRICT'), nullable=False)
@@ -152,6 +183,13 @@ class Timesheet(db.Model):
 
 class Expense(db.Model):
     __tablename__ = 'expenses'
+    __table_args__ = (
+        db.Index('idx_exp_project', 'project_id', 'expense_date'),
+        db.Index('idx_exp_task', 'task_id'),
+        db.Index('idx_exp_status', 'status'),
+        db.Index('idx_exp_submitted_by', 'submitted_by', 'expense_date'),
+        db.Index('idx_exp_date', 'expense_date')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='RESTRICT'), nullable=False)
@@ -171,3 +209,82 @@ class Expense(db.Model):
     task = db.relationship('Task', back_populates='expenses')
     submitter = db.relationship('User', back_populates='submitted_expenses', foreign_keys=[submitted_by])
     approver = db.relationship('User', back_populates='approved_expenses', foreign_keys=[approved_by])
+
+
+# ==================== ROLLUP TABLES ====================
+# Maintained incrementally by rollups.py; rebuild with `flask rebuild-financials`.
+# timesheet_daily holds hours per (day, project, user, task, billable) for series.
+
+class ProjectFinancial(db.Model):
+    __tablename__ = 'project_financials'
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    total_hours = db.Column(db.Float, nullable=False, default=0.0)
+    billable_hours = db.Column(db.Float, nullable=False, default=0.0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    timesheet_count = db.Column(db.Integer, nullable=False, default=0)
+    total_expenses = db.Column(db.Float, nullable=False, default=0.0)
+    billable_expenses = db.Column(db.Float, nullable=False, default=0.0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ProjectExpenseStatusTotal(db.Model):
+    __tablename__ = 'project_expense_status_totals'
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TimesheetDaily(db.Model):
+    __tablename__ = 'timesheet_daily'
+    __table_args__ = (
+        db.Index('uq_tsd_key', 'work_date', 'project_id', 'user_id', 'task_id', 'billable', unique=True),
+        db.Index('idx_tsd_project', 'project_id', 'work_date'),
+        db.Index('idx_tsd_user', 'user_id', 'work_date')
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    work_date = db.Column(db.Date, nullable=False)
+    # No foreign keys: cells are decremented in after_flush, after the flush may already have deleted the task
+    project_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    task_id = db.Column(db.Integer)
+    billable = db.Column(db.Boolean, nullable=False)
+    hours = db.Column(db.Float, nullable=False, default=0.0)
+    cost_amount = db.Column(db.Float, nullable=False, default=0.0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalyticsJob(db.Model):
+    __tablename__ = 'analytics_jobs'
+    __table_args__ = (
+        db.Index('idx_jobs_key', 'request_key', 'status'),
+        db.Index('idx_jobs_expires', 'expires_at')
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    # Hash of path and parameters; identical requests share a job
+    request_key = db.Column(db.String(64), nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON object of query parameters
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    # No foreign key: jobs expire on their own and must not block deleting the user
+    created_by = db.Column(db.Integer)
+    status_code = db.Column(db.Integer)
+    mimetype = db.Column(db.String(100))
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class TableVersion(db.Model):
+    """Counts edits and deletes per table, so every process can tell when its in-memory copy is stale"""
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,95 @@
+from flask import request
+from sqlalchemy import and_, or_
+from datetime import datetime, date
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed limit or cursor query parameter"""
+
+
+# ==================== CURSOR ENCODING ====================
+# Cursors are opaque to clients: url-safe base64 of the last row's sort key.
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+
+# ==================== KEYSET PAGINATION ====================
+
+def get_page_args():
+    """Read `limit` and `cursor` from the query string"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE), request.args.get('cursor')
+
+
+def _after_cursor(columns, values, descending):
+    """WHERE clause selecting rows strictly after `values` in (columns) order"""
+    clauses = []
+    for i, column in enumerate(columns):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def keyset_paginate(query, columns, limit, cursor=None, descending=False, key=None):
+    """Return one page of `query` ordered by `columns` (last one must be unique) and the next cursor
+
+    Seeks past the previous page's last key instead of using OFFSET, so pages
+    stay stable when rows are inserted concurrently. `key` extracts the sort
+    values from a result row when rows are not plain entities.
+    """
+    if cursor:
+        query = query.filter(_after_cursor(columns, decode_cursor(cursor, columns), descending))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        values = key(last) if key else [getattr(last, column.key) for column in columns]
+        next_cursor = encode_cursor(values)
+
+    return rows, next_cursor
@@ -0,0 +1,135 @@
+from flask import jsonify
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import multiprocessing
+import os
+import threading
+
+
+class HasherBusy(Exception):
+    """Raised when more password hashes are pending than PASSWORD_HASH_MAX_PENDING allows"""
+
+
+# ==================== WORKER FUNCTIONS ====================
+# These run in the pool's processes, so they only take and return plain values.
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    """The full parameter string Werkzeug stores for `method`, e.g. 'scrypt' -> 'scrypt:32768:8:1'"""
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password, method):
+    """(matches, replacement hash when the stored one uses other parameters than `method`)"""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split('$', 1)[0] == _method_prefix(method):
+        return True, None
+    return True, generate_password_hash(password, method=method)
+
+
+# ==================== HASHER ====================
+
+class PasswordHasher:
+    """Runs the password KDF in a bounded process pool instead of the request thread
+
+    Hashing holds the GIL for its whole run, so inline it stalls every other
+    request on the worker. At most `max_pending` hashes may be queued or running
+    per app process; beyond that HasherBusy is raised and the request gets a
+    503. With `workers` 0 hashing runs inline, still subject to the limit.
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_pending=32):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def configure(self, method, workers, max_pending):
+        self.shutdown()
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _pool(self):
+        # Created on first use and again after a fork, so a preloaded app never shares its pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Too many password operations in progress')
+        try:
+            if not self.workers:
+                return function(*args)
+            executor = self._pool()
+            try:
+                return executor.submit(function, *args).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool on the next call
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Check `password`; returns (matches, new hash to store or None)
+
+        A new hash is returned when the stored one was made with other
+        parameters than the configured method, so logins migrate users as
+        PASSWORD_HASH_METHOD changes.
+        """
+        return self._run(_verify, pwhash, password, self.method)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher()
+
+
+def hash_password(password):
+    return hasher.hash(password)
+
+
+def verify_password(pwhash, password):
+    return hasher.verify(pwhash, password)
+
+
+def init_app(app):
+    """Configure the hasher from app config and answer HasherBusy with 503"""
+    hasher.configure(
+        app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        app.config.get('PASSWORD_HASH_WORKERS', 2),
+        app.config.get('PASSWORD_HASH_MAX_PENDING', 32)
+    )
+
+    @app.errorhandler(HasherBusy)
+    def _hasher_busy(error):
+        response = jsonify({'error': 'Server busy, please retry'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
@@ -4,6 +4,8 @@ from sales_purchase_models import (
     Partner, Product, PurchaseOrder, PurchaseOrderLine, VendorBill, VendorBillLine
 )
 from datetime import datetime
+from serializers import serializer_for, FieldError
+from conditional import conditional, collection_validator, resource_validator
 from sales_routes import sales_purchase_bp
 
 
@@ -67,6 +69,7 @@ def create_purchase_order():
                 )
                 db.session.add(line)
         
+        purchase_order.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -85,31 +88,30 @@ def create_purchase_order():
 
 
 @sales_purchase_bp.route('/purchase-orders', methods=['GET'])
+@conditional(collection_validator(PurchaseOrder, Partner))
 def get_purchase_orders():
     """Get all purchase orders"""
     auth_error = require_auth()
     if auth_error:
         return auth_error
     
-    purchase_orders = PurchaseOrder.query.all()
+    # Single narrow query: totals are stored on the order, the vendor name is joined in
+    try:
+        serializer = serializer_for(PurchaseOrder).sparse()
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    purchase_orders = serializer.query().outerjoin(Partner, PurchaseOrder.vendor_id == Partner.id).order_by(PurchaseOrder.id)
     
     return jsonify({
-        'purchase_orders': [{
-            'id': po.id,
-            'po_number': po.po_number,
-            'vendor_id': po.vendor_id,
-            'vendor_name': po.vendor.name if po.vendor else None,
-            'project_id': po.project_id,
-            'order_date': po.order_date.isoformat(),
-            'status': po.status,
-            'currency': po.currency,
-            'lines_count': len(po.lines),
-            'total_amount': sum(line.line_total for line in po.lines)
-        } for po in purchase_orders]
+        'purchase_orders': serializer.dump_rows(purchase_orders)
     }), 200
 
 
 @sales_purchase_bp.route('/purchase-orders/<int:po_id>', methods=['GET'])
+@conditional(resource_validator(
+    PurchaseOrder, PurchaseOrder.vendor, (PurchaseOrder.lines, PurchaseOrderLine.product)
+))
 def get_purchase_order(po_id):
     """Get a specific purchase order with lines"""
     auth_error = require_auth()
@@ -240,6 +242,7 @@ def add_purchase_order_line(po_id):
         )
         
         db.session.add(line)
+        purchase_order.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -283,6 +286,7 @@ def update_purchase_order_line(po_id, line_id):
         # Recalculate line total
         line.line_total = line.quantity * line.unit_cost
         
+        line.purchase_order.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -312,7 +316,9 @@ def delete_purchase_order_line(po_id, line_id):
         return jsonify({'error': 'Purchase order line not found'}), 404
     
     try:
+        document = line.purchase_order
         db.session.delete(line)
+        document.refresh_totals()
         db.session.commit()
         return jsonify({'message': 'Purchase order line deleted successfully'}), 200
     except Exception as e:
@@ -374,6 +380,7 @@ def create_vendor_bill():
                 )
                 db.session.add(line)
         
+        bill.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -392,31 +399,30 @@ def create_vendor_bill():
 
 
 @sales_purchase_bp.route('/vendor-bills', methods=['GET'])
+@conditional(collection_validator(VendorBill, Partner))
 def get_vendor_bills():
     """Get all vendor bills"""
     auth_error = require_auth()
     if auth_error:
         return auth_error
     
-    bills = VendorBill.query.all()
+    # Single narrow query: totals are stored on the bill, the vendor name is joined in
+    try:
+        serializer = serializer_for(VendorBill).sparse()
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    bills = serializer.query().outerjoin(Partner, VendorBill.vendor_id == Partner.id).order_by(VendorBill.id)
     
     return jsonify({
-        'bills': [{
-            'id': bill.id,
-            'bill_number': bill.bill_number,
-            'vendor_id': bill.vendor_id,
-            'vendor_name': bill.vendor.name if bill.vendor else None,
-            'project_id': bill.project_id,
-            'bill_date': bill.bill_date.isoformat(),
-            'due_date': bill.due_date.isoformat() if bill.due_date else None,
-            'status': bill.status,
-            'currency': bill.currency,
-            'total_amount': sum(line.line_total for line in bill.lines)
-        } for bill in bills]
+        'bills': serializer.dump_rows(bills)
     }), 200
 
 
 @sales_purchase_bp.route('/vendor-bills/<int:bill_id>', methods=['GET'])
+@conditional(resource_validator(
+    VendorBill, VendorBill.vendor, (VendorBill.lines, VendorBillLine.product)
+))
 def get_vendor_bill(bill_id):
     """Get a specific vendor bill with lines"""
     auth_error = require_auth()
@@ -550,6 +556,7 @@ def add_vendor_bill_line(bill_id):
         )
         
         db.session.add(line)
+        bill.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -593,6 +600,7 @@ def update_vendor_bill_line(bill_id, line_id):
         # Recalculate line total
         line.line_total = line.quantity * line.unit_cost
         
+        line.vendor_bill.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -622,7 +630,9 @@ def delete_vendor_bill_line(bill_id, line_id):
         return jsonify({'error': 'Bill line not found'}), 404
     
     try:
+        document = line.vendor_bill
         db.session.delete(line)
+        document.refresh_totals()
         db.session.commit()
         return jsonify({'message': 'Bill line deleted successfully'}), 200
     except Exception as e:
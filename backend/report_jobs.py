@@ -0,0 +1,210 @@
+from flask import session
+from models import db, AnalyticsJob
+from sqlalchemy import delete, update
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from werkzeug.exceptions import HTTPException
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+# Jobs in these states are still being worked on and accept coalesced requests
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobRejected(ValueError):
+    """The path is not an analytics GET endpoint, or its parameters are not plain values"""
+
+
+# ==================== REQUEST MATCHING ====================
+
+def resolve(app, path, params):
+    """Validate a job request; returns the normalized (path, params, request key)
+
+    Only GET routes of the analytics blueprint can run as jobs. Parameters are
+    query string values, so they must be strings, numbers or booleans.
+    """
+    if not isinstance(path, str) or not path.startswith('/'):
+        raise JobRejected('path must be an absolute URL path such as /analytics/timesheets/overview')
+    path = path.split('?', 1)[0]
+    try:
+        endpoint, _ = app.url_map.bind('localhost').match(path, method='GET')
+    except HTTPException:
+        raise JobRejected('No GET endpoint at %s' % path)
+    if not endpoint.startswith('analytics.') or endpoint == 'analytics.analytics_cache_stats':
+        raise JobRejected('Only analytics endpoints can run as jobs')
+
+    if not isinstance(params, dict):
+        raise JobRejected('params must be an object')
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif isinstance(value, (int, float)):
+            value = str(value)
+        elif not isinstance(value, str):
+            raise JobRejected('Parameter %s must be a string, number or boolean' % name)
+        normalized[name] = value
+
+    request_key = hashlib.sha256(json.dumps([path, normalized], sort_keys=True).encode()).hexdigest()
+    return path, normalized, request_key
+
+
+# ==================== JOB RUNNER ====================
+
+class JobRunner:
+    """Runs analytics jobs on a thread pool of the app process
+
+    The view runs exactly as for a GET request by the submitting user, with
+    its cache, instrumentation and error handling; the response body is stored
+    on the job row. Threads rather than processes, as the views need the app
+    and its database session; the queries release the GIL while SQLite works.
+    A job left queued or running longer than `timeout` (its process died) is
+    reported as failed and no longer coalesced onto.
+    """
+
+    def __init__(self, workers=2, ttl=3600, timeout=900):
+        self.workers = workers
+        self.ttl = ttl
+        self.timeout = timeout
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def configure(self, workers, ttl, timeout):
+        self.shutdown()
+        self.workers = workers
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def _pool(self):
+        # Threads do not survive a fork, so a forked worker starts its own pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analytics-job')
+                self._pid = os.getpid()
+            return self._executor
+
+    def find(self, request_key):
+        """The newest job for `request_key` that is still queued or running
+
+        Finished jobs are not reused: their result reflects the data when they
+        ran, and a new submission should see current data.
+        """
+        now = datetime.utcnow()
+        jobs = AnalyticsJob.query.filter(
+            AnalyticsJob.request_key == request_key,
+            AnalyticsJob.status.in_(ACTIVE_STATUSES),
+            AnalyticsJob.expires_at > now
+        ).order_by(AnalyticsJob.created_at.desc()).all()
+        for job in jobs:
+            if not self.is_lost(job, now):
+                return job
+        return None
+
+    def submit(self, app, path, params, request_key, user_id):
+        """Create a job and queue it; commits, so the row exists before a thread picks it up
+
+        Expired jobs are deleted first. Call `find` in the same transaction
+        beforehand: on SQLite write requests begin IMMEDIATE, so the lookup and
+        insert are atomic across processes too.
+        """
+        now = datetime.utcnow()
+        db.session.execute(delete(AnalyticsJob).where(AnalyticsJob.expires_at <= now))
+        job = AnalyticsJob(
+            id=uuid.uuid4().hex,
+            request_key=request_key,
+            path=path,
+            params=json.dumps(params),
+            status='queued',
+            created_by=user_id,
+            created_at=now,
+            # Until it finishes the row lives long enough to be reported as lost
+            expires_at=now + timedelta(seconds=self.timeout + self.ttl)
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._pool().submit(self._run, app, job.id)
+        return job
+
+    def is_lost(self, job, now=None):
+        now = now or datetime.utcnow()
+        return job.status in ACTIVE_STATUSES and job.created_at < now - timedelta(seconds=self.timeout)
+
+    def _run(self, app, job_id):
+        # Plain UPDATEs rather than read-modify-write: outside a request the
+        # transaction is deferred, and on SQLite only a first statement that
+        # writes waits for the lock instead of failing with "database is locked"
+        with app.app_context():
+            claimed = db.session.execute(
+                update(AnalyticsJob).where(
+                    AnalyticsJob.id == job_id,
+                    AnalyticsJob.status == 'queued'
+                ).values(status='running', started_at=datetime.utcnow())
+            ).rowcount
+            job = db.session.get(AnalyticsJob, job_id) if claimed else None
+            if job is None:
+                db.session.rollback()
+                return
+            path, params, user_id = job.path, json.loads(job.params), job.created_by
+            db.session.commit()
+
+        status_code = mimetype = body = error = None
+        try:
+            with app.test_request_context(path, method='GET', query_string=params):
+                session['user_id'] = user_id
+                response = app.full_dispatch_request()
+                status_code, mimetype, body = response.status_code, response.mimetype, response.get_data(as_text=True)
+        except Exception as e:
+            app.logger.exception('Analytics job %s failed', job_id)
+            error = str(e)
+
+        finished = datetime.utcnow()
+        with app.app_context():
+            db.session.execute(update(AnalyticsJob).where(AnalyticsJob.id == job_id).values(
+                status='succeeded' if status_code == 200 else 'failed',
+                status_code=status_code,
+                mimetype=mimetype,
+                result=body,
+                error=error,
+                finished_at=finished,
+                expires_at=finished + timedelta(seconds=self.ttl)
+            ))
+            db.session.commit()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+runner = JobRunner()
+
+
+def init_app(app):
+    """Configure the job runner from ANALYTICS_JOB_WORKERS, ANALYTICS_JOB_TTL and ANALYTICS_JOB_TIMEOUT"""
+    runner.configure(
+        app.config.get('ANALYTICS_JOB_WORKERS', 2),
+        app.config.get('ANALYTICS_JOB_TTL', 3600),
+        app.config.get('ANALYTICS_JOB_TIMEOUT', 900)
+    )
+
+
+def job_to_dict(job):
+    lost = runner.is_lost(job)
+    return {
+        'id': job.id,
+        'path': job.path,
+        'params': json.loads(job.params),
+        'status': 'failed' if lost else job.status,
+        'status_code': job.status_code,
+        'error': 'Job was lost (its worker stopped)' if lost else job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'result_url': '/analytics/jobs/%s/result' % job.id
+    }
@@ -0,0 +1,475 @@
+from models import db, Project, Timesheet, Expense, ProjectFinancial, ProjectExpenseStatusTotal, TimesheetDaily
+from sqlalchemy import event, func, case, inspect, select, bindparam
+from sqlalchemy.orm import Session
+from aggregations import EXPENSE_STATUS
+
+financials_table = ProjectFinancial.__table__
+expense_status_table = ProjectExpenseStatusTotal.__table__
+daily_table = TimesheetDaily.__table__
+
+# Tables maintained here; init-db rebuilds them all when any of them is new
+ROLLUP_TABLES = [financials_table.name, expense_status_table.name, daily_table.name]
+
+FINANCIAL_COLUMNS = [
+    'total_hours', 'billable_hours', 'total_cost', 'timesheet_count',
+    'total_expenses', 'billable_expenses', 'expense_count'
+]
+
+TIMESHEET_FIELDS = ['project_id', 'user_id', 'task_id', 'work_date', 'hours', 'billable', 'cost_amount']
+EXPENSE_FIELDS = ['project_id', 'amount', 'billable', 'status']
+
+# Grouping of timesheets into timesheet_daily cells
+DAILY_KEY_COLUMNS = [Timesheet.work_date, Timesheet.project_id, Timesheet.user_id, Timesheet.task_id, Timesheet.billable]
+DAILY_KEY_PARAMS = ['k_work_date', 'k_project_id', 'k_user_id', 'k_task_id', 'k_billable']
+
+_daily_cell = (
+    daily_table.c.work_date == bindparam('k_work_date'),
+    daily_table.c.project_id == bindparam('k_project_id'),
+    daily_table.c.user_id == bindparam('k_user_id'),
+    daily_table.c.task_id.is_not_distinct_from(bindparam('k_task_id')),
+    daily_table.c.billable == bindparam('k_billable')
+)
+# Adds d_hours, d_cost and d_count to the timesheet_daily cell named by the k_* parameters
+daily_cell_update = daily_table.update().where(*_daily_cell).values(
+    hours=daily_table.c.hours + bindparam('d_hours'),
+    cost_amount=daily_table.c.cost_amount + bindparam('d_cost'),
+    entry_count=daily_table.c.entry_count + bindparam('d_count')
+)
+# Drops the cell once its last entry is gone, so the table only holds booked days
+daily_cell_delete = daily_table.delete().where(*_daily_cell, daily_table.c.entry_count <= 0)
+
+
+# ==================== DELTA ACCUMULATION ====================
+
+class RollupDeltas:
+    """Collects per-project and per-day increments and applies them to the rollup tables"""
+
+    def __init__(self):
+        self.financials = {}
+        self.expense_statuses = {}
+        self.timesheet_days = {}
+
+    def _add(self, project_id, **deltas):
+        row = self.financials.setdefault(project_id, dict.fromkeys(FINANCIAL_COLUMNS, 0))
+        for column, value in deltas.items():
+            row[column] += value
+
+    def add_timesheet(self, values, sign=1, count=1):
+        """Add one timesheet, or `count` of them whose hours and cost are summed in `values`"""
+        hours = float(values.get('hours') or 0)
+        cost = float(values.get('cost_amount') or 0)
+        billable = values.get('billable', True)
+        self._add(
+            values['project_id'],
+            total_hours=sign * hours,
+            billable_hours=sign * hours if billable else 0,
+            total_cost=sign * cost,
+            timesheet_count=sign * count
+        )
+        key = (values['work_date'], values['project_id'], values['user_id'], values.get('task_id'), bool(billable))
+        hours_delta, cost_delta, count_delta = self.timesheet_days.get(key, (0, 0, 0))
+        self.timesheet_days[key] = (hours_delta + sign * hours, cost_delta + sign * cost, count_delta + sign * count)
+
+    def add_expense(self, values, sign=1):
+        amount = float(values.get('amount') or 0)
+        billable = values.get('billable', True)
+        self._add(
+            values['project_id'],
+            total_expenses=sign * amount,
+            billable_expenses=sign * amount if billable else 0,
+            expense_count=sign
+        )
+        key = (values['project_id'], values.get('status') or 'pending')
+        amount_delta, count_delta = self.expense_statuses.get(key, (0, 0))
+        self.expense_statuses[key] = (amount_delta + sign * amount, count_delta + sign)
+
+    def apply(self, connection, written=True):
+        """Add the deltas to the rollup tables
+
+        `written` says whether the base tables already hold the change (after a
+        flush or insert) or not yet (ahead of a DELETE). A project without a
+        project_financials row, or a missing timesheet_daily cell, is seeded from
+        the base tables rather than started at the delta, so rows written before
+        the rollup existed are not lost.
+        """
+        touched = set(self.financials) | {project_id for project_id, _ in self.expense_statuses}
+        seeded = self._seed_missing_projects(connection, touched, written)
+
+        for project_id, deltas in self.financials.items():
+            if project_id in seeded or not any(deltas.values()):
+                continue
+            connection.execute(
+                financials_table.update()
+                .where(financials_table.c.project_id == project_id)
+                .values({column: financials_table.c[column] + value for column, value in deltas.items()})
+            )
+
+        for (project_id, status), (amount, count) in self.expense_statuses.items():
+            if project_id in seeded or (not amount and not count):
+                continue
+            result = connection.execute(
+                expense_status_table.update()
+                .where(
+                    expense_status_table.c.project_id == project_id,
+                    expense_status_table.c.status == status
+                )
+                .values(
+                    amount=expense_status_table.c.amount + amount,
+                    expense_count=expense_status_table.c.expense_count + count
+                )
+            )
+            if result.rowcount == 0:
+                # The project's rollup exists, so this is the first expense with this status
+                connection.execute(expense_status_table.insert().values(
+                    project_id=project_id, status=status, amount=amount, expense_count=count
+                ))
+
+        # Removed entries normally hit existing cells, so they are applied as executemany batches
+        removals = []
+        for key, (hours, cost, count) in self.timesheet_days.items():
+            params = dict(zip(DAILY_KEY_PARAMS, key), d_hours=hours, d_cost=cost, d_count=count)
+            if count < 0:
+                removals.append(params)
+            elif hours or cost or count:
+                result = connection.execute(daily_cell_update, params)
+                if result.rowcount == 0:
+                    _seed_daily_cell(connection, key, (hours, cost, count), written)
+        if removals:
+            result = connection.execute(daily_cell_update, removals)
+            if result.rowcount != len(removals):
+                for params in removals:
+                    _seed_daily_cell(connection, tuple(params[name] for name in DAILY_KEY_PARAMS),
+                                     (params['d_hours'], params['d_cost'], params['d_count']), written, only_missing=True)
+            connection.execute(daily_cell_delete, [
+                {name: params[name] for name in DAILY_KEY_PARAMS} for params in removals
+            ])
+
+    def _seed_missing_projects(self, connection, project_ids, written):
+        """Write the full rollup of touched projects that have no project_financials row; returns their ids"""
+        if not project_ids:
+            return set()
+        present = set(connection.execute(
+            select(financials_table.c.project_id).where(financials_table.c.project_id.in_(project_ids))
+        ).scalars())
+        missing = project_ids - present
+        if not missing:
+            return set()
+
+        financials, expense_statuses = compute_project_financials(connection, missing)
+        if not written:
+            for project_id, deltas in self.financials.items():
+                if project_id in missing:
+                    row = financials.setdefault(project_id, dict.fromkeys(FINANCIAL_COLUMNS, 0))
+                    for column, value in deltas.items():
+                        row[column] += value
+            for key, (amount, count) in self.expense_statuses.items():
+                if key[0] in missing:
+                    stored_amount, stored_count = expense_statuses.get(key, (0, 0))
+                    expense_statuses[key] = (stored_amount + amount, stored_count + count)
+
+        connection.execute(expense_status_table.delete().where(expense_status_table.c.project_id.in_(missing)))
+        if financials:
+            connection.execute(financials_table.insert(), [
+                dict(project_id=project_id, **values) for project_id, values in financials.items()
+            ])
+        if expense_statuses:
+            connection.execute(expense_status_table.insert(), [
+                dict(project_id=project_id, status=status, amount=amount, expense_count=count)
+                for (project_id, status), (amount, count) in expense_statuses.items()
+            ])
+        return missing
+
+
+def _seed_daily_cell(connection, key, delta, written, only_missing=False):
+    """Insert a timesheet_daily cell from the timesheets it covers (plus `delta` when not yet written)"""
+    work_date, project_id, user_id, task_id, billable = key
+    cell = (work_date, project_id, user_id, task_id, billable)
+    if only_missing and connection.execute(
+        select(daily_table.c.id).where(*_daily_cell), dict(zip(DAILY_KEY_PARAMS, cell))
+    ).first():
+        return
+    hours, cost, count = connection.execute(select(
+        func.coalesce(func.sum(Timesheet.hours), 0),
+        func.coalesce(func.sum(Timesheet.cost_amount), 0),
+        func.count(Timesheet.id)
+    ).where(
+        Timesheet.work_date == work_date,
+        Timesheet.project_id == project_id,
+        Timesheet.user_id == user_id,
+        Timesheet.task_id.is_not_distinct_from(task_id),
+        Timesheet.billable == billable
+    )).one()
+    if not written:
+        hours, cost, count = hours + delta[0], cost + delta[1], count + delta[2]
+    if count > 0:
+        connection.execute(daily_table.insert().values(
+            work_date=work_date, project_id=project_id, user_id=user_id, task_id=task_id,
+            billable=billable, hours=hours, cost_amount=cost, entry_count=count
+        ))
+
+
+def apply_timesheet_rows(connection, rows, sign=1):
+    """Apply rollup deltas for timesheet rows written outside the ORM unit of work"""
+    deltas = RollupDeltas()
+    for row in rows:
+        deltas.add_timesheet(row, sign)
+    deltas.apply(connection)
+
+
+def apply_expense_rows(connection, rows, sign=1):
+    """Apply rollup deltas for expense rows written outside the ORM unit of work"""
+    deltas = RollupDeltas()
+    for row in rows:
+        deltas.add_expense(row, sign)
+    deltas.apply(connection)
+
+
+def remove_timesheets(connection, *criteria):
+    """Take the timesheets matching `criteria` out of the rollup ahead of a set-based DELETE
+
+    Totals are read grouped by the timesheet_daily key, so no timesheet rows are loaded.
+    """
+    totals = connection.execute(
+        select(*DAILY_KEY_COLUMNS, func.sum(Timesheet.hours), func.sum(Timesheet.cost_amount), func.count(Timesheet.id))
+        .where(*criteria)
+        .group_by(*DAILY_KEY_COLUMNS)
+    ).all()
+    deltas = RollupDeltas()
+    for work_date, project_id, user_id, task_id, billable, hours, cost, count in totals:
+        deltas.add_timesheet({
+            'work_date': work_date, 'project_id': project_id, 'user_id': user_id, 'task_id': task_id,
+            'billable': billable, 'hours': hours, 'cost_amount': cost
+        }, sign=-1, count=count)
+    deltas.apply(connection, written=False)
+
+
+# ==================== ORM MAINTENANCE ====================
+
+def _current_values(obj, fields):
+    return {field: getattr(obj, field) for field in fields}
+
+
+def _previous_values(obj, fields):
+    values = {}
+    for field in fields:
+        history = inspect(obj).attrs[field].history
+        values[field] = history.deleted[0] if history.deleted else getattr(obj, field)
+    return values
+
+
+def _fields_changed(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Assigning to an expired attribute (e.g. after a commit) records no previous
+# value unless the attribute has active history; the rollup needs it to
+# subtract the old figures
+for _model, _fields in ((Timesheet, TIMESHEET_FIELDS), (Expense, EXPENSE_FIELDS)):
+    for _field in _fields:
+        event.listen(getattr(_model, _field), 'set', _load_previous_value, active_history=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_project_rollups(session, flush_context):
+    """Fold every flushed Timesheet/Expense change into the rollup tables in the same transaction"""
+    deltas = RollupDeltas()
+    new_projects = []
+    deleted_projects = []
+
+    for obj in session.new:
+        if isinstance(obj, Timesheet):
+            deltas.add_timesheet(_current_values(obj, TIMESHEET_FIELDS))
+        elif isinstance(obj, Expense):
+            deltas.add_expense(_current_values(obj, EXPENSE_FIELDS))
+        elif isinstance(obj, Project):
+            new_projects.append(obj.id)
+
+    for obj in session.dirty:
+        if isinstance(obj, Timesheet) and _fields_changed(obj, TIMESHEET_FIELDS):
+            deltas.add_timesheet(_previous_values(obj, TIMESHEET_FIELDS), sign=-1)
+            deltas.add_timesheet(_current_values(obj, TIMESHEET_FIELDS))
+        elif isinstance(obj, Expense) and _fields_changed(obj, EXPENSE_FIELDS):
+            deltas.add_expense(_previous_values(obj, EXPENSE_FIELDS), sign=-1)
+            deltas.add_expense(_current_values(obj, EXPENSE_FIELDS))
+
+    for obj in session.deleted:
+        if isinstance(obj, Timesheet):
+            deltas.add_timesheet(_previous_values(obj, TIMESHEET_FIELDS), sign=-1)
+        elif isinstance(obj, Expense):
+            deltas.add_expense(_previous_values(obj, EXPENSE_FIELDS), sign=-1)
+        elif isinstance(obj, Project):
+            deleted_projects.append(obj.id)
+
+    if not (deltas.financials or deltas.expense_statuses or new_projects or deleted_projects):
+        return
+
+    connection = session.connection()
+    for project_id in new_projects:
+        connection.execute(financials_table.insert().values(
+            project_id=project_id, **dict.fromkeys(FINANCIAL_COLUMNS, 0)
+        ))
+    deltas.apply(connection)
+    if deleted_projects:
+        connection.execute(financials_table.delete().where(financials_table.c.project_id.in_(deleted_projects)))
+        connection.execute(expense_status_table.delete().where(expense_status_table.c.project_id.in_(deleted_projects)))
+
+
+# ==================== REBUILD ====================
+
+def compute_project_financials(connection=None, project_ids=None):
+    """Recompute the rollup contents from the base tables, for all projects or only `project_ids`
+
+    Reads through `connection` (default: the session's), so it also sees rows
+    flushed but not yet committed on that connection.
+    """
+    connection = connection if connection is not None else db.session.connection()
+    timesheet_filters = []
+    expense_filters = []
+    projects = select(Project.id)
+    if project_ids is not None:
+        timesheet_filters.append(Timesheet.project_id.in_(project_ids))
+        expense_filters.append(Expense.project_id.in_(project_ids))
+        projects = projects.where(Project.id.in_(project_ids))
+    financials = {project_id: dict.fromkeys(FINANCIAL_COLUMNS, 0) for (project_id,) in connection.execute(projects)}
+
+    timesheet_rows = connection.execute(select(
+        Timesheet.project_id,
+        func.sum(Timesheet.hours),
+        func.sum(case((Timesheet.billable == True, Timesheet.hours), else_=0)),
+        func.sum(Timesheet.cost_amount),
+        func.count(Timesheet.id)
+    ).where(*timesheet_filters).group_by(Timesheet.project_id)).all()
+    for project_id, total_hours, billable_hours, total_cost, count in timesheet_rows:
+        financials.setdefault(project_id, dict.fromkeys(FINANCIAL_COLUMNS, 0)).update(
+            total_hours=float(total_hours or 0),
+            billable_hours=float(billable_hours or 0),
+            total_cost=float(total_cost or 0),
+            timesheet_count=count
+        )
+
+    expense_rows = connection.execute(select(
+        Expense.project_id,
+        func.sum(Expense.amount),
+        func.sum(case((Expense.billable == True, Expense.amount), else_=0)),
+        func.count(Expense.id)
+    ).where(*expense_filters).group_by(Expense.project_id)).all()
+    for project_id, total_expenses, billable_expenses, count in expense_rows:
+        financials.setdefault(project_id, dict.fromkeys(FINANCIAL_COLUMNS, 0)).update(
+            total_expenses=float(total_expenses or 0),
+            billable_expenses=float(billable_expenses or 0),
+            expense_count=count
+        )
+
+    status_rows = connection.execute(select(
+        Expense.project_id,
+        EXPENSE_STATUS,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    ).where(*expense_filters).group_by(Expense.project_id, EXPENSE_STATUS)).all()
+    expense_statuses = {
+        (project_id, status): (float(amount or 0), count)
+        for project_id, status, amount, count in status_rows
+    }
+
+    return financials, expense_statuses
+
+
+def compute_timesheet_daily():
+    """Recompute the timesheet_daily cells from timesheets: {key: (hours, cost, count)}"""
+    deltas = RollupDeltas()
+    rows = db.session.query(
+        *DAILY_KEY_COLUMNS, func.sum(Timesheet.hours), func.sum(Timesheet.cost_amount), func.count(Timesheet.id)
+    ).group_by(*DAILY_KEY_COLUMNS)
+    for work_date, project_id, user_id, task_id, billable, hours, cost, count in rows:
+        deltas.add_timesheet({
+            'work_date': work_date, 'project_id': project_id, 'user_id': user_id, 'task_id': task_id,
+            'billable': billable, 'hours': hours, 'cost_amount': cost
+        }, count=count)
+    return deltas.timesheet_days
+
+
+def _differs(a, b):
+    return abs((a or 0) - (b or 0)) > 1e-6
+
+
+def find_financials_drift(financials, expense_statuses):
+    """Compare freshly computed figures with the stored rollup and list mismatches"""
+    drift = []
+
+    stored = {row.project_id: row for row in ProjectFinancial.query.all()}
+    for project_id, expected in financials.items():
+        row = stored.pop(project_id, None)
+        for column, value in expected.items():
+            actual = getattr(row, column) if row else None
+            if row is None or _differs(actual, value):
+                drift.append((project_id, column, actual, value))
+    for project_id in stored:
+        drift.append((project_id, '*', 'orphan row', None))
+
+    stored_statuses = {(row.project_id, row.status): row for row in ProjectExpenseStatusTotal.query.all()}
+    for key, (amount, count) in expense_statuses.items():
+        row = stored_statuses.pop(key, None)
+        if row is None or _differs(row.amount, amount) or row.expense_count != count:
+            drift.append((key[0], 'status:%s' % key[1], (row.amount, row.expense_count) if row else None, (amount, count)))
+    for key, row in stored_statuses.items():
+        if _differs(row.amount, 0) or row.expense_count:
+            drift.append((key[0], 'status:%s' % key[1], (row.amount, row.expense_count), None))
+
+    return drift
+
+
+def find_daily_drift(timesheet_days):
+    """Compare freshly computed timesheet_daily cells with the stored ones"""
+    drift = []
+    stored = {
+        (row.work_date, row.project_id, row.user_id, row.task_id, row.billable): row
+        for row in TimesheetDaily.query.all()
+    }
+    for key, (hours, cost, count) in timesheet_days.items():
+        row = stored.pop(key, None)
+        if row is None or _differs(row.hours, hours) or _differs(row.cost_amount, cost) or row.entry_count != count:
+            drift.append((key[1], _daily_label(key), (row.hours, row.entry_count) if row else None, (hours, count)))
+    for key, row in stored.items():
+        drift.append((key[1], _daily_label(key), (row.hours, row.entry_count), None))
+    return drift
+
+
+def _daily_label(key):
+    work_date, _, user_id, task_id, billable = key
+    return 'daily:%s user=%s task=%s%s' % (work_date, user_id, task_id, ' billable' if billable else '')
+
+
+def rebuild_project_financials(check_only=False):
+    """Recompute the rollup tables from scratch; returns the drift found before rebuilding"""
+    financials, expense_statuses = compute_project_financials()
+    timesheet_days = compute_timesheet_daily()
+    drift = find_financials_drift(financials, expense_statuses) + find_daily_drift(timesheet_days)
+
+    if not check_only:
+        connection = db.session.connection()
+        connection.execute(daily_table.delete())
+        connection.execute(expense_status_table.delete())
+        connection.execute(financials_table.delete())
+        if timesheet_days:
+            connection.execute(daily_table.insert(), [
+                dict(work_date=work_date, project_id=project_id, user_id=user_id, task_id=task_id,
+                     billable=billable, hours=hours, cost_amount=cost, entry_count=count)
+                for (work_date, project_id, user_id, task_id, billable), (hours, cost, count) in timesheet_days.items()
+            ])
+        if financials:
+            connection.execute(financials_table.insert(), [
+                dict(project_id=project_id, **values) for project_id, values in financials.items()
+            ])
+        if expense_statuses:
+            connection.execute(expense_status_table.insert(), [
+                dict(project_id=project_id, status=status, amount=amount, expense_count=count)
+                for (project_id, status), (amount, count) in expense_statuses.items()
+            ])
+        db.session.commit()
+
+    return drift
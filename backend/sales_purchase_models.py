@@ -1,9 +1,35 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func
 from datetime import datetime
 
 # Import existing db instance
 from models import db
 
+
+class DocumentTotalsMixin:
+    """Stored line totals so list views don't have to load every document's lines
+
+    Kept in sync by the line routes via refresh_totals(); `flask
+    backfill-document-totals` recomputes them for existing rows.
+    """
+    amount_total = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    lines_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    def refresh_totals(self):
+        """Recompute amount_total and lines_count from the lines with one aggregate query"""
+        lines = type(self).lines.property
+        line_model = lines.mapper.class_
+        parent_column = next(iter(lines.remote_side))
+        
+        amount_total, lines_count = db.session.query(
+            func.coalesce(func.sum(line_model.line_total), 0),
+            func.count(line_model.id)
+        ).filter(parent_column == self.id).one()
+        
+        self.amount_total = float(amount_total)
+        self.lines_count = lines_count
+        self.updated_at = datetime.utcnow()
+
 class Partner(db.Model):
     __tablename__ = 'partners'
     
@@ -16,6 +42,7 @@ class Partner(db.Model):
     tax_id = db.Column(db.String(50))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     sales_orders = db.relationship('SalesOrder', back_populates='customer')
@@ -36,6 +63,7 @@ class Product(db.Model):
     cost_price = db.Column(db.Float, default=0.0)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     sales_order_lines = db.relationship('SalesOrderLine', back_populates='product')
@@ -46,8 +74,13 @@ class Product(db.Model):
 
 # ==================== SALES MODELS ====================
 
-class SalesOrder(db.Model):
+class SalesOrder(DocumentTotalsMixin, db.Model):
     __tablename__ = 'sales_orders'
+    __table_args__ = (
+        db.Index('idx_so_project', 'project_id'),
+        db.Index('idx_so_customer', 'customer_id'),
+        db.Index('idx_so_status', 'status')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     so_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -69,6 +102,9 @@ class SalesOrder(db.Model):
 
 class SalesOrderLine(db.Model):
     __tablename__ = 'sales_order_lines'
+    __table_args__ = (
+        db.Index('idx_sol_so', 'sales_order_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sales_order_id = db.Column(db.Integer, db.ForeignKey('sales_orders.id', ondelete='CASCADE'), nullable=False)
@@ -84,8 +120,13 @@ class SalesOrderLine(db.Model):
     product = db.relationship('Product', back_populates='sales_order_lines')
 
 
-class CustomerInvoice(db.Model):
+class CustomerInvoice(DocumentTotalsMixin, db.Model):
     __tablename__ = 'customer_invoices'
+    __table_args__ = (
+        db.Index('idx_ci_project', 'project_id'),
+        db.Index('idx_ci_customer', 'customer_id'),
+        db.Index('idx_ci_status', 'status')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -108,6 +149,9 @@ class CustomerInvoice(db.Model):
 
 class CustomerInvoiceLine(db.Model):
     __tablename__ = 'customer_invoice_lines'
+    __table_args__ = (
+        db.Index('idx_cil_ci', 'customer_invoice_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_invoice_id = db.Column(db.Integer, db.ForeignKey('customer_invoices.id', ondelete='CASCADE'), nullable=False)
@@ -124,8 +168,13 @@ class CustomerInvoiceLine(db.Model):
 
 # ==================== PURCHASE MODELS ====================
 
-class PurchaseOrder(db.Model):
+class PurchaseOrder(DocumentTotalsMixin, db.Model):
     __tablename__ = 'purchase_orders'
+    __table_args__ = (
+        db.Index('idx_po_project', 'project_id'),
+        db.Index('idx_po_vendor', 'vendor_id'),
+        db.Index('idx_po_status', 'status')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     po_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -147,6 +196,9 @@ class PurchaseOrder(db.Model):
 
 class PurchaseOrderLine(db.Model):
     __tablename__ = 'purchase_order_lines'
+    __table_args__ = (
+        db.Index('idx_pol_po', 'purchase_order_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     purchase_order_id = db.Column(db.Integer, db.ForeignKey('purchase_orders.id', ondelete='CASCADE'), nullable=False)
@@ -161,8 +213,13 @@ class PurchaseOrderLine(db.Model):
     product = db.relationship('Product', back_populates='purchase_order_lines')
 
 
-class VendorBill(db.Model):
+class VendorBill(DocumentTotalsMixin, db.Model):
     __tablename__ = 'vendor_bills'
+    __table_args__ = (
+        db.Index('idx_vb_project', 'project_id'),
+        db.Index('idx_vb_vendor', 'vendor_id'),
+        db.Index('idx_vb_status', 'status')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     bill_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -185,6 +242,9 @@ class VendorBill(db.Model):
 
 class VendorBillLine(db.Model):
     __tablename__ = 'vendor_bill_lines'
+    __table_args__ = (
+        db.Index('idx_vbl_vb', 'vendor_bill_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     vendor_bill_id = db.Column(db.Integer, db.ForeignKey('vendor_bills.id', ondelete='CASCADE'), nullable=False)
@@ -5,6 +5,8 @@ from sales_purchase_models import (
     PurchaseOrder, PurchaseOrderLine, VendorBill, VendorBillLine
 )
 from datetime import datetime
+from serializers import serializer_for, FieldError
+from conditional import conditional, collection_validator, resource_validator
 
 sales_purchase_bp = Blueprint('sales_purchase', __name__)
 
@@ -68,23 +70,17 @@ def get_partners():
     
     partner_type = request.args.get('partner_type')
     
-    query = Partner.query
+    try:
+        serializer = serializer_for(Partner).sparse()
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = serializer.query()
     if partner_type:
         query = query.filter((Partner.partner_type == partner_type) | (Partner.partner_type == 'both'))
     
-    partners = query.all()
-    
     return jsonify({
-        'partners': [{
-            'id': p.id,
-            'name': p.name,
-            'partner_type': p.partner_type,
-            'email': p.email,
-            'phone': p.phone,
-            'address': p.address,
-            'tax_id': p.tax_id,
-            'is_active': p.is_active
-        } for p in partners]
+        'partners': serializer.dump_rows(query.order_by(Partner.id))
     }), 200
 
 
@@ -209,19 +205,13 @@ def get_products():
     if auth_error:
         return auth_error
     
-    products = Product.query.all()
+    try:
+        serializer = serializer_for(Product).sparse()
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
-        'products': [{
-            'id': p.id,
-            'name': p.name,
-            'product_code': p.product_code,
-            'description': p.description,
-            'product_type': p.product_type,
-            'sale_price': p.sale_price,
-            'cost_price': p.cost_price,
-            'is_active': p.is_active
-        } for p in products]
+        'products': serializer.dump_rows(serializer.query().order_by(Product.id))
     }), 200
 
 
@@ -323,6 +313,7 @@ def create_sales_order():
                 )
                 db.session.add(line)
         
+        sales_order.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -341,31 +332,30 @@ def create_sales_order():
 
 
 @sales_purchase_bp.route('/sales-orders', methods=['GET'])
+@conditional(collection_validator(SalesOrder, Partner))
 def get_sales_orders():
     """Get all sales orders"""
     auth_error = require_auth()
     if auth_error:
         return auth_error
     
-    sales_orders = SalesOrder.query.all()
+    # Single narrow query: totals are stored on the order, the customer name is joined in
+    try:
+        serializer = serializer_for(SalesOrder).sparse()
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    sales_orders = serializer.query().outerjoin(Partner, SalesOrder.customer_id == Partner.id).order_by(SalesOrder.id)
     
     return jsonify({
-        'sales_orders': [{
-            'id': so.id,
-            'so_number': so.so_number,
-            'customer_id': so.customer_id,
-            'customer_name': so.customer.name if so.customer else None,
-            'project_id': so.project_id,
-            'order_date': so.order_date.isoformat(),
-            'status': so.status,
-            'currency': so.currency,
-            'lines_count': len(so.lines),
-            'total_amount': sum(line.line_total for line in so.lines)
-        } for so in sales_orders]
+        'sales_orders': serializer.dump_rows(sales_orders)
     }), 200
 
 
 @sales_purchase_bp.route('/sales-orders/<int:so_id>', methods=['GET'])
+@conditional(resource_validator(
+    SalesOrder, SalesOrder.customer, (SalesOrder.lines, SalesOrderLine.product)
+))
 def get_sales_order(so_id):
     """Get a specific sales order with lines"""
     auth_error = require_auth()
@@ -498,6 +488,7 @@ def add_sales_order_line(so_id):
         )
         
         db.session.add(line)
+        sales_order.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -543,6 +534,7 @@ def update_sales_order_line(so_id, line_id):
         # Recalculate line total
         line.line_total = line.quantity * line.unit_price
         
+        line.sales_order.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -572,7 +564,9 @@ def delete_sales_order_line(so_id, line_id):
         return jsonify({'error': 'Sales order line not found'}), 404
     
     try:
+        document = line.sales_order
         db.session.delete(line)
+        document.refresh_totals()
         db.session.commit()
         return jsonify({'message': 'Sales order line deleted successfully'}), 200
     except Exception as e:
@@ -634,6 +628,7 @@ def create_customer_invoice():
                 )
                 db.session.add(line)
         
+        invoice.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -652,31 +647,30 @@ def create_customer_invoice():
 
 
 @sales_purchase_bp.route('/customer-invoices', methods=['GET'])
+@conditional(collection_validator(CustomerInvoice, Partner))
 def get_customer_invoices():
     """Get all customer invoices"""
     auth_error = require_auth()
     if auth_error:
         return auth_error
     
-    invoices = CustomerInvoice.query.all()
+    # Single narrow query: totals are stored on the invoice, the customer name is joined in
+    try:
+        serializer = serializer_for(CustomerInvoice).sparse()
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    invoices = serializer.query().outerjoin(Partner, CustomerInvoice.customer_id == Partner.id).order_by(CustomerInvoice.id)
     
     return jsonify({
-        'invoices': [{
-            'id': inv.id,
-            'invoice_number': inv.invoice_number,
-            'customer_id': inv.customer_id,
-            'customer_name': inv.customer.name if inv.customer else None,
-            'project_id': inv.project_id,
-            'invoice_date': inv.invoice_date.isoformat(),
-            'due_date': inv.due_date.isoformat() if inv.due_date else None,
-            'status': inv.status,
-            'currency': inv.currency,
-            'total_amount': sum(line.line_total for line in inv.lines)
-        } for inv in invoices]
+        'invoices': serializer.dump_rows(invoices)
     }), 200
 
 
 @sales_purchase_bp.route('/customer-invoices/<int:invoice_id>', methods=['GET'])
+@conditional(resource_validator(
+    CustomerInvoice, CustomerInvoice.customer, (CustomerInvoice.lines, CustomerInvoiceLine.product)
+))
 def get_customer_invoice(invoice_id):
     """Get a specific customer invoice with lines"""
     auth_error = require_auth()
@@ -810,6 +804,7 @@ def add_customer_invoice_line(invoice_id):
         )
         
         db.session.add(line)
+        invoice.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -853,6 +848,7 @@ def update_customer_invoice_line(invoice_id, line_id):
         # Recalculate line total
         line.line_total = line.quantity * line.unit_price
         
+        line.customer_invoice.refresh_totals()
         db.session.commit()
         
         return jsonify({
@@ -882,7 +878,9 @@ def delete_customer_invoice_line(invoice_id, line_id):
         return jsonify({'error': 'Invoice line not found'}), 404
     
     try:
+        document = line.customer_invoice
         db.session.delete(line)
+        document.refresh_totals()
         db.session.commit()
         return jsonify({'message': 'Invoice line deleted successfully'}), 200
     except Exception as e:
@@ -0,0 +1,186 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from models import db, User, Project, Task, TaskComment, Expense
+from sales_purchase_models import Partner, Product, SalesOrder, CustomerInvoice, PurchaseOrder, VendorBill
+from datetime import datetime, date
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+# ==================== JSON PROVIDERS ====================
+# Installed as app.json, so jsonify() and request.get_json() go through them.
+# Dates and datetimes are written as ISO 8601, the same text the routes get
+# from .isoformat(), so serializers can hand over raw column values.
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError('Object of type %s is not JSON serializable' % type(value).__name__)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's stdlib provider, with ISO 8601 dates instead of HTTP dates"""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """Encode and decode with orjson, which handles dates and datetimes natively"""
+
+    def _options(self, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Use orjson for JSON responses and request bodies when installed (FAST_JSON, default on)"""
+    if orjson is not None and app.config.get('FAST_JSON', True):
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = StdlibJSONProvider(app)
+
+
+# ==================== MODEL SERIALIZERS ====================
+
+class FieldError(ValueError):
+    """Raised for a `fields` query parameter naming fields the endpoint does not have"""
+
+
+def requested_fields():
+    """Field names from a comma separated `fields` query parameter, or None when absent"""
+    value = request.args.get('fields')
+    if not value:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class ModelSerializer:
+    """The columns a model is rendered with, selectable as plain tuples
+
+    `fields` are column names of `model` or (output key, column expression)
+    pairs for renamed or joined values. Routes select `columns` (or use
+    `query()`) instead of loading ORM objects and turn each row into a dict
+    with `dump_row`; no per-field conversion happens in Python.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.keys = []
+        self.columns = []
+        for field in fields:
+            key, column = field if isinstance(field, tuple) else (field, getattr(model, field))
+            self.keys.append(key)
+            self.columns.append(column)
+
+    def extend(self, fields):
+        """A serializer with extra (output key, column expression) fields, e.g. joined or aggregated values"""
+        return ModelSerializer(self.model, list(zip(self.keys, self.columns)) + list(fields))
+
+    def only(self, names):
+        """A serializer for a subset of the fields; `id` is always kept so rows stay addressable"""
+        unknown = [name for name in names if name not in self.keys]
+        if unknown:
+            raise FieldError('Unknown field(s): %s' % ', '.join(unknown))
+        wanted = set(names) | {'id'}
+        return ModelSerializer(self.model, [
+            (key, column) for key, column in zip(self.keys, self.columns) if key in wanted
+        ])
+
+    def sparse(self):
+        """Apply the request's `fields` parameter: only the requested columns are selected"""
+        names = requested_fields()
+        return self.only(names) if names else self
+
+    def query(self, *extra):
+        """SELECT of the serializer's columns; `extra` columns go last and are left out of dumps"""
+        return db.session.query(*self.columns, *extra)
+
+    def dump_row(self, row):
+        return dict(zip(self.keys, row))
+
+    def dump_rows(self, rows):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in rows]
+
+    def dump_object(self, obj):
+        """For ORM objects already loaded; only plain model columns are supported"""
+        return {key: getattr(obj, column.key) for key, column in zip(self.keys, self.columns)}
+
+
+SERIALIZERS = {}
+
+
+def register(model, fields):
+    SERIALIZERS[model] = ModelSerializer(model, fields)
+    return SERIALIZERS[model]
+
+
+def serializer_for(model):
+    return SERIALIZERS[model]
+
+
+register(User, ['id', 'email', 'is_active', 'created_at'])
+
+register(Project, [
+    'id', 'project_code', 'name', 'description', 'project_manager_id',
+    'start_date', 'end_date', 'status', 'budget_amount', 'created_at'
+])
+
+register(Task, [
+    'id', 'title', 'description', 'priority', 'state', 'due_date', 'created_by', 'created_at'
+])
+
+register(TaskComment, ['id', 'user_id', 'comment', 'created_at'])
+
+register(Expense, [
+    'id', 'task_id', 'submitted_by', 'approved_by', 'expense_date',
+    'description', 'amount', 'billable', 'status', 'receipt_url'
+])
+
+register(Partner, ['id', 'name', 'partner_type', 'email', 'phone', 'address', 'tax_id', 'is_active'])
+
+register(Product, [
+    'id', 'name', 'product_code', 'description', 'product_type', 'sale_price', 'cost_price', 'is_active'
+])
+
+register(SalesOrder, [
+    'id', 'so_number', 'customer_id', ('customer_name', Partner.name), 'project_id', 'order_date',
+    'status', 'currency', 'lines_count', ('total_amount', SalesOrder.amount_total)
+])
+
+register(CustomerInvoice, [
+    'id', 'invoice_number', 'customer_id', ('customer_name', Partner.name), 'project_id',
+    'invoice_date', 'due_date', 'status', 'currency', ('total_amount', CustomerInvoice.amount_total)
+])
+
+register(PurchaseOrder, [
+    'id', 'po_number', 'vendor_id', ('vendor_name', Partner.name), 'project_id', 'order_date',
+    'status', 'currency', 'lines_count', ('total_amount', PurchaseOrder.amount_total)
+])
+
+register(VendorBill, [
+    'id', 'bill_number', 'vendor_id', ('vendor_name', Partner.name), 'project_id',
+    'bill_date', 'due_date', 'status', 'currency', ('total_amount', VendorBill.amount_total)
+])
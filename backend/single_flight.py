@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; requests are then only coalesced within a process
+    fcntl = None
+
+# Seconds between polls for another process's lock, and how often stale files are swept
+LOCK_POLL_INTERVAL = 0.01
+SWEEP_EVERY = 200
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Runs one computation per key at a time and hands its result to everyone waiting for it
+
+    Threads of one process wait on the leader's event. Across processes the
+    leader holds an flock on `<directory>/<key>.lock` while it computes and
+    writes the result next to it; a process that finds the lock taken waits
+    for it and uses that result if it was written after it started waiting
+    and computed from after `not_before` (e.g. its own last commit). Threads
+    only share within one `generation`. A waiter that times out, or whose
+    leader failed, computes by itself.
+    Results are (body bytes, JSON-serializable metadata) and are only shared,
+    never cached. `namespace` (e.g. the database URI) keeps apps that share a
+    directory apart.
+    """
+
+    def __init__(self, directory=None, timeout=30):
+        self.namespace = None
+        self.directory = directory
+        self.timeout = timeout
+        self.enabled = True
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.leaders = 0
+        self.coalesced_threads = 0
+        self.coalesced_processes = 0
+        self.timeouts = 0
+
+    def configure(self, enabled, directory, timeout, namespace=None):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.directory = directory
+        self.timeout = timeout
+        if directory and fcntl is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def do(self, key, compute, generation=None, not_before=0):
+        """Return (result, coalesced); `key` is any hashable, `compute` returns (body, metadata)
+
+        `generation` identifies the data version within this process (requests
+        of different generations never share); `not_before` is the earliest
+        wall-clock time another process's computation may have started.
+        """
+        if not self.enabled:
+            return compute(), False
+        call_key = (key, generation)
+        with self._lock:
+            call = self._calls.get(call_key)
+            leader = call is None
+            if leader:
+                call = self._calls[call_key] = _Call()
+                self.leaders += 1
+
+        if not leader:
+            if call.done.wait(self.timeout) and call.result is not None:
+                with self._lock:
+                    self.coalesced_threads += 1
+                return call.result, True
+            with self._lock:
+                self.timeouts += 1
+            return compute(), False
+
+        try:
+            call.result, coalesced = self._across_processes(key, compute, not_before)
+            return call.result, coalesced
+        finally:
+            with self._lock:
+                del self._calls[call_key]
+            call.done.set()
+
+    # ==================== CROSS-PROCESS ====================
+
+    def _paths(self, key):
+        name = hashlib.sha256(repr((self.namespace, key)).encode()).hexdigest()
+        return os.path.join(self.directory, name + '.lock'), os.path.join(self.directory, name + '.result')
+
+    def _across_processes(self, key, compute, not_before):
+        if fcntl is None or not self.directory:
+            return compute(), False
+        lock_path, result_path = self._paths(key)
+        waiting_since = time.time()
+        with open(lock_path, 'a') as lock_file:
+            acquired = self._acquire(lock_file)
+            if acquired is None:
+                with self._lock:
+                    self.timeouts += 1
+                return compute(), False
+            try:
+                if not acquired:
+                    result = self._read(result_path, waiting_since, not_before)
+                    if result is not None:
+                        with self._lock:
+                            self.coalesced_processes += 1
+                        return result, True
+                started_at = time.time()
+                result = compute()
+                self._write(result_path, result, started_at)
+                return result, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire(self, lock_file):
+        """True when the lock was free, False after waiting for another holder, None on timeout"""
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            pass
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return False
+            except BlockingIOError:
+                continue
+        return None
+
+    def _read(self, result_path, waiting_since, not_before):
+        try:
+            with open(result_path, 'rb') as result_file:
+                header = json.loads(result_file.readline())
+                body = result_file.read()
+        except (OSError, ValueError):
+            return None
+        if header['written_at'] < waiting_since or header['started_at'] <= not_before:
+            return None
+        return body, header['metadata']
+
+    def _write(self, result_path, result, started_at):
+        body, metadata = result
+        header = json.dumps({'started_at': started_at, 'written_at': time.time(), 'metadata': metadata})
+        temp_path = '%s.%d.%d' % (result_path, os.getpid(), threading.get_ident())
+        with open(temp_path, 'wb') as result_file:
+            result_file.write(header.encode() + b'\n' + body)
+        os.replace(temp_path, result_path)
+
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % SWEEP_EVERY == 0
+        if sweep:
+            self._sweep()
+
+    def _sweep(self):
+        """Delete files of keys not computed for a while, so the directory does not grow with every parameter set
+
+        Every leader rewrites the result file, so its mtime is the key's last
+        use. Removing a lock file another process still holds only costs that
+        key its coalescing once.
+        """
+        cutoff = time.time() - max(self.timeout, 60) * 10
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.result'):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    os.unlink(entry.path[:-len('.result')] + '.lock')
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'across_processes': fcntl is not None and bool(self.directory),
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'coalesced_threads': self.coalesced_threads,
+                'coalesced_processes': self.coalesced_processes,
+                'timeouts': self.timeouts
+            }
@@ -0,0 +1,80 @@
+from flask import has_request_context
+from models import db
+from sqlalchemy import event
+from db_routing import request_is_read_only
+import sqlite3
+import time
+
+# Applied to every new SQLite connection in tuned mode
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,        # negative = KiB, so ~64 MB of page cache
+    'mmap_size': 268435456,      # 256 MB memory-mapped I/O
+    'busy_timeout': 5000,        # ms to wait on a locked database before failing
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY'
+}
+
+def request_is_write():
+    """Write requests start IMMEDIATE transactions; reads (see db_routing.read_only) and non-request work stay deferred"""
+    return has_request_context() and not request_is_read_only()
+
+
+def _is_lock_error(error):
+    message = str(error)
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def configure_engine(engine, pragmas=None, begin_retries=5, retry_backoff=0.05, immediate=request_is_write):
+    """Tune a SQLite engine through connect/begin events
+
+    pysqlite's own transaction handling is switched off so the begin event
+    decides how transactions start. Writers use BEGIN IMMEDIATE, taking the
+    write lock up front instead of failing on a SHARED -> RESERVED upgrade
+    halfway through; if the lock is still held after busy_timeout the BEGIN is
+    retried with exponential backoff. In WAL mode readers never block writers.
+    """
+    pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA %s = %s' % (name, value))
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _begin_transaction(conn):
+        statement = 'BEGIN IMMEDIATE' if immediate() else 'BEGIN'
+        driver_connection = conn.connection.driver_connection
+        if driver_connection.in_transaction:
+            # :memory: databases share one DBAPI connection, which may already be in a transaction
+            return
+        for attempt in range(begin_retries + 1):
+            try:
+                driver_connection.execute(statement)
+                return
+            except sqlite3.OperationalError as e:
+                if attempt == begin_retries or not _is_lock_error(e):
+                    raise
+                time.sleep(retry_backoff * 2 ** attempt)
+
+
+def init_app(app):
+    """Enable tuned SQLite mode on every SQLite engine (primary and binds) when SQLITE_TUNED is set"""
+    if not app.config.get('SQLITE_TUNED'):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'sqlite':
+                continue
+            configure_engine(
+                engine,
+                pragmas=app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS),
+                begin_retries=app.config.get('SQLITE_BEGIN_RETRIES', 5),
+                retry_backoff=app.config.get('SQLITE_RETRY_BACKOFF', 0.05)
+            )
+            # Connections opened before the listeners existed (e.g. during init) lack the pragmas
+            engine.dispose()
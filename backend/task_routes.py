@@ -0,0 +1,211 @@
+from flask import Blueprint, request, jsonify, session
+from models import db, User, Project, Task, TaskAssignment
+from sqlalchemy import insert, update
+from datetime import datetime
+
+task_bp = Blueprint('tasks', __name__)
+
+# Largest batch accepted per request; the whole batch is one transaction
+MAX_BULK_TASKS = 1000
+
+UPDATABLE_FIELDS = ['title', 'description', 'priority', 'state', 'due_date']
+
+
+# Helper function to check authentication
+def require_auth():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    return None
+
+
+class ItemError(ValueError):
+    """A bulk item that failed validation"""
+
+
+# ==================== BULK TASK HELPERS ====================
+
+def _read_items(key):
+    """The submitted items from a JSON array or {key: [...]}, or None for any other body"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get(key)
+    if not isinstance(data, list):
+        return None
+    return data
+
+
+def _parse_fields(payload, fields):
+    """Validate the task columns present in `payload` and return them"""
+    values = {}
+    for field in fields:
+        if field not in payload:
+            continue
+        value = payload[field]
+        if field == 'title':
+            if not isinstance(value, str) or not value.strip():
+                raise ItemError('Title is required')
+            if len(value) > 200:
+                raise ItemError('Title must be at most 200 characters')
+        elif field == 'due_date':
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+            except (TypeError, ValueError):
+                raise ItemError('due_date must be YYYY-MM-DD')
+        elif value is not None and not isinstance(value, str):
+            raise ItemError('%s must be a string' % field)
+        values[field] = value
+    return values
+
+
+def _parse_new_task(payload):
+    """Column values and assignee ids for one item of a bulk create"""
+    if not isinstance(payload, dict):
+        raise ItemError('Item must be a JSON object')
+    if not payload.get('title'):
+        raise ItemError('Title is required')
+    
+    values = _parse_fields(payload, UPDATABLE_FIELDS)
+    values.setdefault('priority', 'medium')
+    values.setdefault('state', 'todo')
+    
+    assignee_ids = payload.get('assignee_ids') or []
+    if not isinstance(assignee_ids, list) or not all(isinstance(uid, int) for uid in assignee_ids):
+        raise ItemError('assignee_ids must be a list of user ids')
+    return values, list(dict.fromkeys(assignee_ids))
+
+
+def _parse_task_update(payload):
+    """Primary key and changed column values for one item of a bulk update"""
+    if not isinstance(payload, dict):
+        raise ItemError('Item must be a JSON object')
+    if not isinstance(payload.get('id'), int):
+        raise ItemError('id is required')
+    
+    values = _parse_fields(payload, UPDATABLE_FIELDS)
+    if not values:
+        raise ItemError('Nothing to update')
+    return payload['id'], values
+
+
+# ==================== BULK TASK ROUTES ====================
+
+@task_bp.route('/projects/<int:project_id>/tasks/bulk', methods=['POST'])
+def bulk_create_tasks(project_id):
+    """Create many tasks (with optional initial assignments) in one transaction"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    if not db.session.query(Project.id).filter(Project.id == project_id).first():
+        return jsonify({'error': 'Project not found'}), 404
+    
+    items = _read_items('tasks')
+    if items is None:
+        return jsonify({'error': 'Body must be a JSON array of tasks'}), 400
+    if len(items) > MAX_BULK_TASKS:
+        return jsonify({'error': 'At most %d tasks per request' % MAX_BULK_TASKS}), 400
+    
+    results = [None] * len(items)
+    parsed = []
+    for index, payload in enumerate(items):
+        try:
+            parsed.append((index,) + _parse_new_task(payload))
+        except ItemError as e:
+            results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+    
+    # Assignees of all items are checked with one IN query
+    assignee_ids = {uid for _, _, uids in parsed for uid in uids}
+    known_users = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(assignee_ids))}
+    valid = []
+    for index, values, uids in parsed:
+        unknown = [uid for uid in uids if uid not in known_users]
+        if unknown:
+            results[index] = {'index': index, 'status': 'error', 'error': 'User(s) not found: %s' % ', '.join(map(str, unknown))}
+        else:
+            valid.append((index, values, uids))
+    
+    try:
+        if valid:
+            rows = [dict(values, project_id=project_id, created_by=session['user_id']) for _, values, _ in valid]
+            # executemany with RETURNING; ids come back in parameter order
+            task_ids = db.session.scalars(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+            ).all()
+            assignments = [
+                {'task_id': task_id, 'user_id': uid}
+                for task_id, (_, _, uids) in zip(task_ids, valid) for uid in uids
+            ]
+            if assignments:
+                db.session.execute(insert(TaskAssignment), assignments)
+            db.session.commit()
+            
+            for task_id, (index, _, uids) in zip(task_ids, valid):
+                results[index] = {'index': index, 'status': 'created', 'id': task_id, 'assignee_ids': uids}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    created = len(valid)
+    
+    return jsonify({
+        'project_id': project_id,
+        'received': len(items),
+        'created': created,
+        'failed': len(items) - created,
+        'results': results
+    }), 201 if created else 200
+
+
+@task_bp.route('/tasks/bulk', methods=['PATCH'])
+def bulk_update_tasks():
+    """Update many tasks in one transaction; each item names its task by id"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    items = _read_items('tasks')
+    if items is None:
+        return jsonify({'error': 'Body must be a JSON array of task updates'}), 400
+    if len(items) > MAX_BULK_TASKS:
+        return jsonify({'error': 'At most %d tasks per request' % MAX_BULK_TASKS}), 400
+    
+    results = [None] * len(items)
+    parsed = []
+    for index, payload in enumerate(items):
+        try:
+            parsed.append((index,) + _parse_task_update(payload))
+        except ItemError as e:
+            results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+    
+    task_ids = {task_id for _, task_id, _ in parsed}
+    known_tasks = {tid for (tid,) in db.session.query(Task.id).filter(Task.id.in_(task_ids))}
+    seen = set()
+    rows = []
+    for index, task_id, values in parsed:
+        if task_id not in known_tasks:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Task not found'}
+        elif task_id in seen:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Task listed more than once'}
+        else:
+            seen.add(task_id)
+            rows.append((index, dict(values, id=task_id)))
+    
+    try:
+        if rows:
+            now = datetime.utcnow()
+            # ORM bulk UPDATE by primary key: one executemany per distinct set of columns
+            db.session.execute(update(Task), [dict(values, updated_at=now) for _, values in rows])
+            db.session.commit()
+            
+            for index, values in rows:
+                results[index] = {'index': index, 'status': 'updated', 'id': values['id']}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'received': len(items),
+        'updated': len(rows),
+        'failed': len(items) - len(rows),
+        'results': results
+    }), 200
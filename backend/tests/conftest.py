@@ -0,0 +1,50 @@
+import os
+import sys
+
+# The app imports its modules by bare name (import models), as when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app import create_app
+from models import db, User
+from analytics_cache import cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///%s' % (tmp_path / 'test.db'),
+        'ANALYTICS_SINGLE_FLIGHT_DIR': str(tmp_path / 'single_flight'),
+        'PASSWORD_HASH_WORKERS': 0
+    })
+    with app.app_context():
+        db.create_all()
+    # The cache is module-level; entries from another test's database must not be served
+    cache.clear()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(email='owner@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def auth_client(client, user_id):
+    """A client logged in as `user_id`"""
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
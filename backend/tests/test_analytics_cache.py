@@ -0,0 +1,78 @@
+from datetime import date
+import pytest
+from analytics_cache import AnalyticsCache
+from models import db, Project, Expense
+
+
+@pytest.fixture
+def project_id(app, user_id):
+    with app.app_context():
+        project = Project(project_code='AC', name='Cached')
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(Expense(project_id=project.id, submitted_by=user_id, expense_date=date(2025, 1, 6),
+                               description='Travel', amount=100, billable=True, status='pending'))
+        db.session.commit()
+        return project.id
+
+
+def add_expense(app, project_id, user_id, amount):
+    with app.app_context():
+        db.session.add(Expense(project_id=project_id, submitted_by=user_id, expense_date=date(2025, 1, 7),
+                               description='Hotel', amount=amount, billable=False, status='approved'))
+        db.session.commit()
+
+
+def test_commit_to_a_read_table_invalidates_the_entry(app, auth_client, user_id, project_id):
+    url = '/analytics/expenses/project/%d' % project_id
+    first = auth_client.get(url)
+    assert first.headers['X-Cache'] == 'MISS'
+    second = auth_client.get(url)
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+    add_expense(app, project_id, user_id, 50)
+    third = auth_client.get(url)
+    assert third.headers['X-Cache'] == 'MISS'
+    assert third.get_json()['total_expenses'] == 150.0
+    assert auth_client.get(url).headers['X-Cache'] == 'HIT'
+
+
+def test_parameters_are_part_of_the_key(auth_client, project_id):
+    url = '/analytics/expenses/project/%d' % project_id
+    assert auth_client.get(url).headers['X-Cache'] == 'MISS'
+    assert auth_client.get(url, query_string={'start_date': '2025-01-07'}).headers['X-Cache'] == 'MISS'
+    assert auth_client.get(url).headers['X-Cache'] == 'HIT'
+
+
+def test_unauthenticated_requests_bypass_the_cache(client, auth_client, project_id):
+    url = '/analytics/expenses/project/%d' % project_id
+    auth_client.get(url)
+    assert auth_client.get(url).headers['X-Cache'] == 'HIT'
+
+    with client.session_transaction() as session:
+        session.clear()
+    response = client.get(url)
+    assert response.status_code == 401
+    assert 'X-Cache' not in response.headers
+
+
+def test_result_computed_before_a_commit_is_not_stored():
+    cache = AnalyticsCache()
+    generation = cache.generation(['expenses'])
+    # A commit lands while the view is still computing
+    cache.invalidate_tables(['expenses'])
+    cache.set('key', 'stale', ['expenses'], generation)
+    assert cache.get('key') is None
+
+    cache.set('key', 'fresh', ['expenses'], cache.generation(['expenses']))
+    assert cache.get('key') == 'fresh'
+
+
+def test_commit_to_another_table_keeps_the_entry():
+    cache = AnalyticsCache()
+    cache.set('key', 'value', ['expenses'], cache.generation(['expenses']))
+    cache.invalidate_tables(['timesheets'])
+    assert cache.get('key') == 'value'
+    cache.invalidate_tables(['expenses'])
+    assert cache.get('key') is None
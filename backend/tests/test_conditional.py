@@ -0,0 +1,64 @@
+from datetime import date
+from models import db, User, Project, Task, TaskComment
+from sales_purchase_models import Partner, SalesOrder
+
+
+def seed_sales_order():
+    customer = Partner(name='Acme', partner_type='customer')
+    db.session.add(customer)
+    db.session.flush()
+    order = SalesOrder(so_number='SO-1', customer_id=customer.id, order_date=date(2025, 1, 1))
+    db.session.add(order)
+    db.session.commit()
+    return customer.id, order.id
+
+
+def fetch_etag(client, url):
+    """GET `url` and return its ETag"""
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def test_partner_rename_changes_sales_order_tags(app, auth_client):
+    with app.app_context():
+        customer_id, order_id = seed_sales_order()
+    urls = ['/sales-orders', '/sales-orders/%d' % order_id]
+    etags = {url: fetch_etag(auth_client, url) for url in urls}
+    for url in urls:
+        assert auth_client.get(url, headers={'If-None-Match': etags[url]}).status_code == 304
+
+    response = auth_client.put('/partners/%d' % customer_id, json={'name': 'Acme Renamed'})
+    assert response.status_code == 200
+
+    response = auth_client.get('/sales-orders/%d' % order_id, headers={'If-None-Match': etags[urls[1]]})
+    assert response.status_code == 200
+    assert response.get_json()['sales_order']['customer_name'] == 'Acme Renamed'
+    response = auth_client.get('/sales-orders', headers={'If-None-Match': etags[urls[0]]})
+    assert response.status_code == 200
+    assert response.get_json()['sales_orders'][0]['customer_name'] == 'Acme Renamed'
+
+
+def test_email_change_changes_task_tag(app, auth_client, user_id):
+    with app.app_context():
+        commenter = User(email='before@example.com', password_hash='x')
+        project = Project(project_code='C1', name='Project')
+        db.session.add_all([commenter, project])
+        db.session.flush()
+        task = Task(project_id=project.id, title='Task', created_by=user_id)
+        db.session.add(task)
+        db.session.flush()
+        db.session.add(TaskComment(task_id=task.id, user_id=commenter.id, comment='Comment'))
+        db.session.commit()
+        commenter_id, task_id = commenter.id, task.id
+    url = '/tasks/%d' % task_id
+    etag = fetch_etag(auth_client, url)
+    assert auth_client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.get(User, commenter_id).email = 'after@example.com'
+        db.session.commit()
+
+    response = auth_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['task']['comments'][0]['user_email'] == 'after@example.com'
@@ -0,0 +1,52 @@
+from datetime import date
+from models import db, Project, Task, TaskComment, Timesheet
+from sales_purchase_models import Partner, SalesOrder
+
+
+def seed_project(user_id):
+    project = Project(project_code='DEL', name='Project', project_manager_id=user_id)
+    db.session.add(project)
+    db.session.flush()
+    task = Task(project_id=project.id, title='Task', created_by=user_id)
+    db.session.add(task)
+    db.session.flush()
+    db.session.add(TaskComment(task_id=task.id, user_id=user_id, comment='Comment'))
+    db.session.commit()
+    return project.id
+
+
+def test_delete_project_unlinks_sales_order(app, auth_client, user_id):
+    with app.app_context():
+        project_id = seed_project(user_id)
+        customer = Partner(name='Customer', partner_type='customer')
+        db.session.add(customer)
+        db.session.flush()
+        order = SalesOrder(so_number='SO-1', project_id=project_id, customer_id=customer.id, order_date=date(2025, 1, 1))
+        db.session.add(order)
+        db.session.commit()
+        order_id = order.id
+
+    response = auth_client.delete('/projects/%d' % project_id)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['deleted']['projects'] == 1
+    assert body['deleted']['task_comments'] == 1
+    assert body['nulled']['sales_orders'] == 1
+
+    with app.app_context():
+        assert db.session.get(Project, project_id) is None
+        assert db.session.get(SalesOrder, order_id).project_id is None
+
+
+def test_delete_project_with_timesheets_is_restricted(app, auth_client, user_id):
+    with app.app_context():
+        project_id = seed_project(user_id)
+        db.session.add(Timesheet(project_id=project_id, user_id=user_id, work_date=date(2025, 1, 1), hours=2))
+        db.session.commit()
+
+    response = auth_client.delete('/projects/%d' % project_id)
+    assert response.status_code == 409
+    assert response.get_json()['references'] == {'timesheets': 1}
+
+    with app.app_context():
+        assert db.session.get(Project, project_id) is not None
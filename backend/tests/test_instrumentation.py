@@ -0,0 +1,20 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db
+
+
+def test_failed_statement_does_not_leave_a_start_time(app):
+    with app.test_request_context('/'):
+        g.query_count = 0
+        connection = db.session.connection()
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        assert connection.info.get('query_start_time') == []
+        assert g.query_count == 1
+
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        assert g.query_count == 2
+        db.session.remove()
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+import pytest
+from models import db, Project, Task, TaskComment, User
+from pagination import (
+    decode_cursor, encode_cursor, get_page_args, PaginationError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+
+
+def test_cursor_round_trip():
+    columns = [TaskComment.created_at, TaskComment.id]
+    values = [datetime(2025, 1, 6, 9, 30, 15, 250000), 42]
+    cursor = encode_cursor(values)
+    assert '=' not in cursor
+    assert decode_cursor(cursor, columns) == values
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'e30', encode_cursor([1]), encode_cursor(['x', 1])])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(PaginationError):
+        decode_cursor(cursor, [TaskComment.created_at, TaskComment.id])
+
+
+@pytest.mark.parametrize('limit, expected', [(None, DEFAULT_PAGE_SIZE), ('5', 5), ('100000', MAX_PAGE_SIZE)])
+def test_limit_is_clamped(app, limit, expected):
+    query = {} if limit is None else {'limit': limit}
+    with app.test_request_context('/users', query_string=query):
+        assert get_page_args() == (expected, None)
+
+
+@pytest.mark.parametrize('limit', ['0', '-1', 'ten'])
+def test_invalid_limit_is_rejected(app, limit):
+    with app.test_request_context('/users', query_string={'limit': limit}):
+        with pytest.raises(PaginationError):
+            get_page_args()
+
+
+def test_bad_cursor_returns_400(auth_client):
+    response = auth_client.get('/users', query_string={'cursor': 'garbage'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+    assert auth_client.get('/users', query_string={'limit': '0'}).status_code == 400
+
+
+def test_users_pages_follow_id_order(app, auth_client, user_id):
+    with app.app_context():
+        db.session.add_all([User(email='user%d@example.com' % i, password_hash='x') for i in range(4)])
+        db.session.commit()
+        expected = [user.id for user in User.query.order_by(User.id)]
+
+    seen, cursor = [], None
+    while True:
+        query = {'limit': 2, 'fields': 'id'}
+        if cursor:
+            query['cursor'] = cursor
+        body = auth_client.get('/users', query_string=query).get_json()
+        seen.extend(user['id'] for user in body['users'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_comments_page_newest_first_across_timestamp_ties(app, auth_client, user_id):
+    base = datetime(2025, 1, 6, 9, 0, 0, 500000)
+    with app.app_context():
+        project = Project(project_code='PG', name='Paged')
+        db.session.add(project)
+        db.session.flush()
+        task = Task(project_id=project.id, title='Task', created_by=user_id)
+        db.session.add(task)
+        db.session.flush()
+        # Two pairs share a timestamp, so the id tiebreaker decides their order
+        offsets = [0, 1, 1, 2, 2, 3]
+        comments = [TaskComment(task_id=task.id, user_id=user_id, comment='c%d' % i,
+                                created_at=base + timedelta(minutes=offset))
+                    for i, offset in enumerate(offsets)]
+        db.session.add_all(comments)
+        db.session.commit()
+        task_id = task.id
+        expected = [c.id for c in sorted(comments, key=lambda c: (c.created_at, c.id), reverse=True)]
+
+    seen, cursor = [], None
+    for _ in range(len(expected)):
+        query = {'limit': 2}
+        if cursor:
+            query['cursor'] = cursor
+        response = auth_client.get('/tasks/%d/comments' % task_id, query_string=query)
+        assert response.status_code == 200
+        body = response.get_json()
+        seen.extend(comment['id'] for comment in body['comments'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == expected
+    assert cursor is None
@@ -0,0 +1,136 @@
+from datetime import date
+import pytest
+import rollups
+from models import db, Project, Task, Timesheet, Expense
+
+
+def drift():
+    return rollups.rebuild_project_financials(check_only=True)
+
+
+@pytest.fixture
+def project_ids(app, user_id):
+    """Two projects, each with a task, a timesheet and an expense"""
+    with app.app_context():
+        ids = []
+        for code in ('R1', 'R2'):
+            project = Project(project_code=code, name=code)
+            db.session.add(project)
+            db.session.flush()
+            task = Task(project_id=project.id, title='Task', created_by=user_id)
+            db.session.add(task)
+            db.session.flush()
+            db.session.add(Timesheet(
+                project_id=project.id, task_id=task.id, user_id=user_id, work_date=date(2025, 1, 6),
+                hours=4, billable=True, internal_cost_rate=50, cost_amount=200
+            ))
+            db.session.add(Expense(
+                project_id=project.id, task_id=task.id, submitted_by=user_id, expense_date=date(2025, 1, 6),
+                description='Travel', amount=120, billable=True, status='pending'
+            ))
+            ids.append(project.id)
+        db.session.commit()
+        assert drift() == []
+        return ids
+
+
+def test_timesheet_writes_keep_rollups_in_sync(app, user_id, project_ids):
+    first, second = project_ids
+    with app.app_context():
+        timesheet = Timesheet(project_id=first, user_id=user_id, work_date=date(2025, 1, 7), hours=2, billable=False,
+                              internal_cost_rate=50, cost_amount=100)
+        db.session.add(timesheet)
+        db.session.commit()
+        assert drift() == []
+
+        timesheet.hours = 3.5
+        timesheet.cost_amount = 175
+        timesheet.billable = True
+        db.session.commit()
+        assert drift() == []
+
+        timesheet.project_id = second
+        timesheet.work_date = date(2025, 1, 8)
+        db.session.commit()
+        assert drift() == []
+
+        db.session.delete(timesheet)
+        db.session.commit()
+        assert drift() == []
+
+
+def test_expense_writes_keep_rollups_in_sync(app, user_id, project_ids):
+    first, second = project_ids
+    with app.app_context():
+        expense = Expense(project_id=first, submitted_by=user_id, expense_date=date(2025, 1, 7),
+                          description='Hotel', amount=300, billable=False, status=None)
+        db.session.add(expense)
+        db.session.commit()
+        assert drift() == []
+
+        expense.status = 'approved'
+        expense.amount = 280
+        db.session.commit()
+        assert drift() == []
+
+        expense.project_id = second
+        expense.billable = True
+        db.session.commit()
+        assert drift() == []
+
+        db.session.delete(expense)
+        db.session.commit()
+        assert drift() == []
+
+
+def test_task_writes_keep_rollups_in_sync(app, auth_client, user_id, project_ids):
+    first, _ = project_ids
+    with app.app_context():
+        task = Task(project_id=first, title='Second task', created_by=user_id)
+        db.session.add(task)
+        db.session.flush()
+        db.session.add(Timesheet(project_id=first, task_id=task.id, user_id=user_id, work_date=date(2025, 1, 9),
+                                 hours=1, billable=True, internal_cost_rate=50, cost_amount=50))
+        db.session.commit()
+        task_id = task.id
+        assert drift() == []
+
+        task.state = 'done'
+        db.session.commit()
+        assert drift() == []
+
+    # Deleting the task removes its timesheets
+    assert auth_client.delete('/tasks/%d' % task_id).status_code == 200
+    with app.app_context():
+        assert drift() == []
+
+
+def test_rebuild_restores_drifted_rollups(app, project_ids):
+    first, _ = project_ids
+    with app.app_context():
+        # A write that bypasses the ORM leaves the rollups behind
+        db.session.execute(Expense.__table__.update().values(amount=Expense.amount * 2))
+        db.session.commit()
+        assert drift() != []
+
+        rollups.rebuild_project_financials()
+        assert drift() == []
+
+
+def test_null_status_expenses_count_as_pending_on_both_paths(app, auth_client, user_id, project_ids):
+    first, _ = project_ids
+    with app.app_context():
+        # A Core insert stores NULL (the ORM would apply the 'pending' default)
+        row = dict(project_id=first, submitted_by=user_id, expense_date=date(2025, 1, 7),
+                   description='Taxi', amount=30, billable=False, status=None)
+        db.session.execute(Expense.__table__.insert(), [row])
+        rollups.apply_expense_rows(db.session.connection(), [row])
+        db.session.commit()
+        assert drift() == []
+
+    url = '/analytics/expenses/project/%d' % first
+    rolled_up = auth_client.get(url).get_json()
+    # A date filter makes the endpoint read the base tables
+    scanned = auth_client.get(url, query_string={'start_date': '2000-01-01'}).get_json()
+    assert rolled_up['expenses_by_status'] == scanned['expenses_by_status'] == {'pending': {'amount': 150.0, 'count': 2}}
+    assert rolled_up['total_expenses'] == scanned['total_expenses'] == 150.0
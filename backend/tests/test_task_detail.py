@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from models import db, User, Project, Task, TaskAssignment, TaskComment, TaskAttachment
+
+
+def seed_task(children):
+    """A task with `children` assignments, comments and attachments, each by a different user"""
+    users = [User(email='user%d-%d@example.com' % (children, i), password_hash='x') for i in range(children + 1)]
+    db.session.add_all(users)
+    db.session.flush()
+    project = Project(project_code='P%d' % children, name='Project', project_manager_id=users[0].id)
+    db.session.add(project)
+    db.session.flush()
+    task = Task(project_id=project.id, title='Task', created_by=users[0].id)
+    db.session.add(task)
+    db.session.flush()
+    for user in users[1:]:
+        db.session.add(TaskAssignment(task_id=task.id, user_id=user.id))
+        db.session.add(TaskComment(task_id=task.id, user_id=user.id, comment='Comment'))
+        db.session.add(TaskAttachment(task_id=task.id, uploaded_by=user.id, file_name='a.txt', file_url='/files/a.txt'))
+    db.session.commit()
+    return users[0].id, task.id
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def fetch_task(app, client, children):
+    with app.app_context():
+        user_id, task_id = seed_task(children)
+        engine = db.engine
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    with count_statements(engine) as statements:
+        response = client.get('/tasks/%d' % task_id)
+    assert response.status_code == 200
+    return response.get_json()['task'], len(statements)
+
+
+def test_task_detail_query_count_does_not_grow_with_children(app, client):
+    task, few = fetch_task(app, client, 1)
+    assert len(task['comments']) == 1
+
+    task, many = fetch_task(app, client, 25)
+    assert len(task['comments']) == len(task['assignments']) == len(task['attachments']) == 25
+    assert all(comment['user_email'] for comment in task['comments'])
+    assert many == few
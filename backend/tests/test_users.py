@@ -0,0 +1,20 @@
+from models import db, User
+import core_routes
+
+
+def test_update_missing_user_returns_404_without_hashing(auth_client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(core_routes, 'hash_password', lambda password: calls.append(password))
+    response = auth_client.put('/users/999', json={'password': 'secret'})
+    assert response.status_code == 404
+    assert calls == []
+
+
+def test_update_user_password_and_email(app, auth_client, user_id):
+    response = auth_client.put('/users/%d' % user_id, json={'email': 'renamed@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json()['user']['email'] == 'renamed@example.com'
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert user.email == 'renamed@example.com'
+        assert user.password_hash != 'x'
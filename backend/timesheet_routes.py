@@ -0,0 +1,221 @@
+from flask import Blueprint, request, jsonify, session
+from models import db, User, Project, Task, Timesheet
+from sqlalchemy import insert
+from datetime import datetime
+import json
+import rollups
+
+timesheet_bp = Blueprint('timesheets', __name__)
+
+# Rows inserted per executemany batch (and per transaction)
+BULK_CHUNK_SIZE = 1000
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+REQUIRED_FIELDS = ['project_id', 'user_id', 'work_date', 'hours', 'internal_cost_rate']
+
+
+# Helper function to check authentication
+def require_auth():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    return None
+
+
+class RowError(ValueError):
+    """A bulk row that failed validation"""
+
+
+# ==================== BULK INGESTION HELPERS ====================
+
+def _ndjson_rows(stream):
+    """Yield one decoded object per non-blank NDJSON line, None for undecodable lines"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _read_rows():
+    """Iterator over the submitted rows, or None if the body is neither NDJSON nor a JSON array
+    
+    NDJSON bodies are decoded line by line from the request stream so large
+    uploads are never held in memory as a whole.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        return _ndjson_rows(request.stream)
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('timesheets')
+    if not isinstance(data, list):
+        return None
+    return iter(data)
+
+
+def _parse_row(payload):
+    """Validate one submitted row and return its timesheet column values"""
+    if not isinstance(payload, dict):
+        raise RowError('Row must be a JSON object')
+    
+    missing = [field for field in REQUIRED_FIELDS if payload.get(field) is None]
+    if missing:
+        raise RowError('Missing %s' % ', '.join(missing))
+    
+    try:
+        project_id = int(payload['project_id'])
+        user_id = int(payload['user_id'])
+        task_id = int(payload['task_id']) if payload.get('task_id') is not None else None
+        work_date = datetime.strptime(payload['work_date'], '%Y-%m-%d').date()
+        hours = round(float(payload['hours']), 2)
+        internal_cost_rate = float(payload['internal_cost_rate'])
+    except (TypeError, ValueError) as e:
+        raise RowError('Invalid value: %s' % e)
+    
+    if hours <= 0:
+        raise RowError('hours must be positive')
+    if internal_cost_rate < 0:
+        raise RowError('internal_cost_rate must not be negative')
+    
+    billable = payload.get('billable', True)
+    if not isinstance(billable, bool):
+        raise RowError('billable must be true or false')
+    
+    return {
+        'project_id': project_id,
+        'task_id': task_id,
+        'user_id': user_id,
+        'work_date': work_date,
+        'hours': hours,
+        'billable': billable,
+        'internal_cost_rate': internal_cost_rate,
+        'cost_amount': hours * internal_cost_rate,
+        'status': payload.get('status', 'draft'),
+        'notes': payload.get('notes')
+    }
+
+
+def _dedupe_key(task_id, user_id, work_date, hours, billable):
+    """Natural key of a timesheet entry (uq_ts_unique in schema.txt)"""
+    return (task_id, user_id, work_date, round(hours, 2), bool(billable))
+
+
+def _insert_chunk(chunk, seen):
+    """Check references and duplicates for one chunk of (index, values) and insert the survivors
+    
+    Returns {index: status} for created and duplicate rows, {index: message}
+    for rejected ones and the keys the chunk adds to `seen` once it commits.
+    Reference and duplicate lookups are one IN query each. The users' rows are
+    locked (FOR UPDATE; on SQLite the write transaction's lock does this) until
+    the chunk commits, so concurrent bulk requests for the same users cannot
+    both pass the duplicate check. Other writers are not deduplicated.
+    """
+    project_ids = {values['project_id'] for _, values in chunk}
+    user_ids = {values['user_id'] for _, values in chunk}
+    task_ids = {values['task_id'] for _, values in chunk if values['task_id'] is not None}
+    work_dates = [values['work_date'] for _, values in chunk]
+    
+    known_projects = {pid for (pid,) in db.session.query(Project.id).filter(Project.id.in_(project_ids))}
+    known_users = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(user_ids)).with_for_update()}
+    task_projects = dict(db.session.query(Task.id, Task.project_id).filter(Task.id.in_(task_ids)).all())
+    
+    existing = db.session.query(
+        Timesheet.task_id,
+        Timesheet.user_id,
+        Timesheet.work_date,
+        Timesheet.hours,
+        Timesheet.billable
+    ).filter(
+        Timesheet.user_id.in_(user_ids),
+        Timesheet.work_date.between(min(work_dates), max(work_dates))
+    )
+    keys = {_dedupe_key(*row) for row in existing}
+    
+    statuses = {}
+    errors = {}
+    rows = []
+    for index, values in chunk:
+        if values['project_id'] not in known_projects:
+            errors[index] = 'Project not found'
+        elif values['user_id'] not in known_users:
+            errors[index] = 'User not found'
+        elif values['task_id'] is not None and task_projects.get(values['task_id']) != values['project_id']:
+            errors[index] = 'Task not found in project'
+        else:
+            key = _dedupe_key(values['task_id'], values['user_id'], values['work_date'], values['hours'], values['billable'])
+            if key in seen or key in keys:
+                statuses[index] = 'duplicate'
+            else:
+                keys.add(key)
+                statuses[index] = 'created'
+                rows.append(values)
+    
+    if rows:
+        # executemany through the ORM bulk path; the rollup is updated in the same transaction
+        db.session.execute(insert(Timesheet), rows)
+        rollups.apply_timesheet_rows(db.session.connection(), rows)
+    
+    return statuses, errors, keys
+
+
+# ==================== BULK TIMESHEET ROUTES ====================
+
+@timesheet_bp.route('/timesheets/bulk', methods=['POST'])
+def bulk_create_timesheets():
+    """Ingest many timesheet entries from a JSON array or NDJSON body"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    
+    rows = _read_rows()
+    if rows is None:
+        return jsonify({'error': 'Body must be a JSON array of timesheets or NDJSON'}), 400
+    
+    statuses = []
+    errors = {}
+    seen = set()
+    chunk = []
+    
+    def flush_chunk():
+        try:
+            chunk_statuses, chunk_errors, chunk_keys = _insert_chunk(chunk, seen)
+            db.session.commit()
+            # Only committed rows count as seen; a rolled back chunk left nothing behind
+            seen.update(chunk_keys)
+        except Exception as e:
+            db.session.rollback()
+            chunk_statuses = {}
+            chunk_errors = {index: str(e) for index, _ in chunk}
+        for index, status in chunk_statuses.items():
+            statuses[index] = status
+        for index, message in chunk_errors.items():
+            statuses[index] = 'error'
+            errors[str(index)] = message
+        chunk.clear()
+    
+    for index, payload in enumerate(rows):
+        statuses.append(None)
+        try:
+            chunk.append((index, _parse_row(payload)))
+        except RowError as e:
+            statuses[index] = 'error'
+            errors[str(index)] = str(e)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            flush_chunk()
+    if chunk:
+        flush_chunk()
+    
+    created = statuses.count('created')
+    
+    return jsonify({
+        'received': len(statuses),
+        'created': created,
+        'duplicates': statuses.count('duplicate'),
+        'failed': statuses.count('error'),
+        'statuses': statuses,
+        'errors': errors
+    }), 201 if created else 200